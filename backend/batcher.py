@@ -0,0 +1,148 @@
+import asyncio
+import threading
+import time
+
+import numpy as np
+
+# Upper bounds (inclusive) of the batch-size and queue-delay histogram buckets
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024]
+QUEUE_DELAY_BUCKETS_MS = [0.1, 0.25, 0.5, 1, 2, 5, 10, 25, 50, 100]
+
+
+class BatchMetrics:
+    """Counters and fixed-bucket histograms for batch size and queue delay."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.rows = 0
+        self.max_batch_size = 0
+        self.queue_delay_sum_ms = 0.0
+        self.queue_delay_max_ms = 0.0
+        self.batch_size_counts = [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+        self.queue_delay_counts = [0] * (len(QUEUE_DELAY_BUCKETS_MS) + 1)
+
+    def record(self, batch_size, delays_ms):
+        with self._lock:
+            self.batches += 1
+            self.rows += batch_size
+            self.max_batch_size = max(self.max_batch_size, batch_size)
+            self.batch_size_counts[np.searchsorted(BATCH_SIZE_BUCKETS, batch_size)] += 1
+            for i in np.searchsorted(QUEUE_DELAY_BUCKETS_MS, delays_ms):
+                self.queue_delay_counts[i] += 1
+            self.queue_delay_sum_ms += float(np.sum(delays_ms))
+            self.queue_delay_max_ms = max(self.queue_delay_max_ms, float(np.max(delays_ms)))
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "rows": self.rows,
+                "avg_batch_size": round(self.rows / self.batches, 2) if self.batches else 0.0,
+                "max_batch_size": self.max_batch_size,
+                "avg_queue_delay_ms": round(self.queue_delay_sum_ms / self.rows, 4) if self.rows else 0.0,
+                "max_queue_delay_ms": round(self.queue_delay_max_ms, 4),
+                "batch_size_histogram": _histogram(BATCH_SIZE_BUCKETS, self.batch_size_counts),
+                "queue_delay_ms_histogram": _histogram(QUEUE_DELAY_BUCKETS_MS, self.queue_delay_counts)
+            }
+
+
+def _histogram(bounds, counts):
+    labels = [f"<={bound}" for bound in bounds] + [f">{bounds[-1]}"]
+    return dict(zip(labels, counts))
+
+
+class MicroBatcher:
+    """Collects concurrent single-row requests and scores them as one matrix.
+
+    The first queued row opens a window of ``window_ms``; everything that
+    arrives before it closes (up to ``max_rows``) is scored together by
+    ``score_fn(key, X) -> list of results`` on the default thread pool, and
+    each caller's future is resolved with its own row's result. Rows submitted
+    with different keys (e.g. model versions around a reload) are scored
+    separately. Batches are dispatched without waiting for the previous one,
+    so the next window is collected while earlier ones are scored; at most
+    ``max_in_flight`` are scored at a time, beyond that collection waits.
+    """
+
+    def __init__(self, score_fn, window_ms=2.0, max_rows=256, max_in_flight=4):
+        self.score_fn = score_fn
+        self.window = window_ms / 1000
+        self.max_rows = max_rows
+        self.max_in_flight = max_in_flight
+        self.metrics = BatchMetrics()
+        self._loop = None
+        self._queue = None
+        self._worker = None
+        self._slots = None
+        self._in_flight = set()
+
+    def _ensure_worker(self):
+        # (Re)start the collector on the running loop, e.g. after a test client restarts it
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+            self._in_flight = set()
+            self._worker = loop.create_task(self._run())
+
+    async def submit(self, row, key=None):
+        """Queue one raw feature row and wait for its scored result."""
+        self._ensure_worker()
+        future = self._loop.create_future()
+        self._queue.put_nowait((row, future, time.perf_counter(), key))
+        return await future
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.window
+        while len(batch) < self.max_rows:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            # Callers that went away (cancelled futures) are dropped before scoring
+            batch = [item for item in batch if not item[1].done()]
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            self.metrics.record(len(batch), [(started - queued) * 1000 for _, _, queued, _ in batch])
+            groups = {}
+            for item in batch:
+                groups.setdefault(id(item[3]), []).append(item)
+            for group in groups.values():
+                await self._slots.acquire()
+                task = self._loop.create_task(self._score(group))
+                # Keep a reference until done so the task is not garbage collected
+                self._in_flight.add(task)
+                task.add_done_callback(self._finished)
+
+    def _finished(self, task):
+        self._in_flight.discard(task)
+        self._slots.release()
+
+    async def _score(self, group):
+        X = np.vstack([row for row, _, _, _ in group])
+        try:
+            results = await self._loop.run_in_executor(None, self.score_fn, group[0][3], X)
+        except Exception as e:
+            for _, future, _, _ in group:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future, _, _), result in zip(group, results):
+            if not future.done():
+                future.set_result(result)
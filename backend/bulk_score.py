@@ -0,0 +1,233 @@
+import argparse
+import collections
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from config import MODEL_DIR
+from registry import load_bundle
+from scoring import VELOCITY_FEATURES, assemble_matrix, raw_feature_order
+
+# creditcard.csv column for each raw feature name used by the API
+CSV_COLUMN = {'amount': 'Amount', 'time': 'Time'}
+OUTPUT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+RESULT_FIELDS = ["prediction", "confidence", "fraud_probability", "legitimate_probability"]
+
+
+def input_columns(feature_names):
+    # CSV columns to read, in feature_names order
+    return [CSV_COLUMN.get(name, name) for name in raw_feature_order(feature_names)]
+
+
+def check_header(header, feature_names):
+    # Velocity columns are optional; see frame_matrix
+    missing = [name for name in input_columns(feature_names) if name not in header and name not in VELOCITY_FEATURES]
+    if missing:
+        raise ValueError(f"Input is missing columns: {', '.join(missing)}")
+
+
+def frame_matrix(frame, feature_names):
+    """Raw float64 matrix in feature_names order from a creditcard.csv-schema chunk.
+
+    Velocity features the file does not have are filled in as for a card's
+    first transaction, like /predict without a card id.
+    """
+    columns = input_columns(feature_names)
+    if all(column in frame.columns for column in columns):
+        return frame[columns].to_numpy(dtype=np.float64)
+    return assemble_matrix({name: frame[column].to_numpy(dtype=np.float64)
+                            for name, column in zip(raw_feature_order(feature_names), columns)
+                            if column in frame.columns}, feature_names)
+
+
+def csv_header():
+    return "row," + ",".join(RESULT_FIELDS) + "\n"
+
+
+def format_results(results, start_row, fmt):
+    """Serialize one chunk of results; ``row`` is the 0-based data row of the input."""
+    if fmt == "ndjson":
+        return "".join(json.dumps({"row": start_row + i, **result}) + "\n" for i, result in enumerate(results))
+    return "".join(
+        f"{start_row + i},{r['prediction']},{r['confidence']},{r['fraud_probability']},{r['legitimate_probability']}\n"
+        for i, r in enumerate(results)
+    )
+
+
+def score_chunk(bundle, X, start_row, fmt):
+    # Scoring and formatting both happen on the worker, so the writer only copies text out
+    return format_results(bundle.score(X), start_row, fmt)
+
+
+def score_frame(bundle, frame, start_row, fmt):
+    # score_chunk for a parsed DataFrame; building the matrix also stays off the caller's thread
+    return score_chunk(bundle, frame_matrix(frame, bundle.feature_names), start_row, fmt)
+
+
+class CsvChunker:
+    """Split a CSV byte stream into DataFrames of ``chunk_rows`` rows as data arrives.
+
+    Only the unparsed tail of the stream and the rows of the current chunk are
+    held in memory, however large the upload is.
+    """
+
+    def __init__(self, chunk_rows):
+        self.chunk_rows = chunk_rows
+        self.header = None
+        self._header_line = None
+        self._pending = b""
+        self._lines = []
+
+    def feed(self, data):
+        self._pending += data
+        *lines, self._pending = self._pending.split(b"\n")
+        return self._add(lines)
+
+    def finish(self):
+        lines, self._pending = [self._pending], b""
+        frames = self._add(lines)
+        if self._lines:
+            frames.append(self._parse(self._lines))
+            self._lines = []
+        return frames
+
+    def _add(self, lines):
+        frames = []
+        for line in lines:
+            if not line.strip():
+                continue
+            if self._header_line is None:
+                self._header_line = line.rstrip(b"\r")
+                self.header = [name.strip().strip('"') for name in self._header_line.decode().split(",")]
+                continue
+            self._lines.append(line)
+            if len(self._lines) >= self.chunk_rows:
+                frames.append(self._parse(self._lines))
+                self._lines = []
+        return frames
+
+    def _parse(self, lines):
+        # pandas is only imported once an upload arrives; the API's scoring path never needs it
+        import pandas as pd
+
+        return pd.read_csv(io.BytesIO(self._header_line + b"\n" + b"\n".join(lines)))
+
+
+class Progress:
+    """Periodic rows and rows/sec report on stderr."""
+
+    def __init__(self, label, every=5.0):
+        self.label = label
+        self.every = every
+        self.rows = 0
+        self.started = time.perf_counter()
+        self._last_report = self.started
+
+    @property
+    def rate(self):
+        elapsed = time.perf_counter() - self.started
+        return self.rows / elapsed if elapsed > 0 else 0.0
+
+    def update(self, rows):
+        self.rows += rows
+        now = time.perf_counter()
+        if now - self._last_report >= self.every:
+            self._last_report = now
+            print(f"{self.label}: {self.rows:,} rows scored ({self.rate:,.0f} rows/s)", file=sys.stderr)
+
+    def done(self):
+        elapsed = time.perf_counter() - self.started
+        print(f"{self.label}: done, {self.rows:,} rows in {elapsed:.1f} s ({self.rate:,.0f} rows/s)", file=sys.stderr)
+
+
+def ordered_results(futures_in, max_pending):
+    """Yield results of submitted futures in order, keeping at most max_pending in flight."""
+    pending = collections.deque()
+    for future in futures_in:
+        pending.append(future)
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+_worker_bundle = None
+
+
+def _init_worker(model_dir):
+    global _worker_bundle
+    _worker_bundle = load_bundle(model_dir)
+
+
+def _score_in_worker(X, start_row, fmt):
+    return score_chunk(_worker_bundle, X, start_row, fmt)
+
+
+def bulk_score(input_path, output, model_dir=MODEL_DIR, fmt="csv", chunk_rows=50000, workers=None):
+    """Score a creditcard.csv-schema file chunk by chunk across worker processes.
+
+    Memory stays bounded by ``2 * workers`` chunks in flight regardless of the
+    input size. Returns the number of rows scored.
+    """
+    workers = workers or os.cpu_count()
+    bundle = load_bundle(model_dir)
+    print(f"Scoring {input_path} with model {bundle.version} on {workers} workers", file=sys.stderr)
+    progress = Progress("bulk score")
+
+    import pandas as pd
+
+    reader = pd.read_csv(input_path, chunksize=chunk_rows)
+    if fmt == "csv":
+        output.write(csv_header())
+
+    def chunks():
+        start_row = 0
+        for frame in reader:
+            if start_row == 0:
+                check_header(list(frame.columns), bundle.feature_names)
+            X = frame_matrix(frame, bundle.feature_names)
+            yield X, start_row
+            start_row += len(X)
+
+    if workers == 1:
+        for X, start_row in chunks():
+            output.write(score_chunk(bundle, X, start_row, fmt))
+            progress.update(len(X))
+    else:
+        # Each worker process loads its own model copy once, then receives only chunks
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(model_dir,)) as executor:
+            sizes = collections.deque()
+
+            def submitted():
+                for X, start_row in chunks():
+                    sizes.append(len(X))
+                    yield executor.submit(_score_in_worker, X, start_row, fmt)
+
+            for text in ordered_results(submitted(), 2 * workers):
+                output.write(text)
+                progress.update(sizes.popleft())
+    progress.done()
+    return progress.rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score a creditcard.csv-schema file with the current model")
+    parser.add_argument("input", help="CSV with Time, V1-V28 and Amount columns ('-' for stdin)")
+    parser.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+    parser.add_argument("--format", choices=sorted(OUTPUT_FORMATS), default="csv")
+    parser.add_argument("--chunk-rows", type=int, default=50000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="scoring processes (default: all cores)")
+    parser.add_argument("--model-dir", default=MODEL_DIR, help="directory with the trained artifacts")
+    args = parser.parse_args()
+
+    source = sys.stdin if args.input == "-" else args.input
+    if args.output == "-":
+        bulk_score(source, sys.stdout, args.model_dir, args.format, args.chunk_rows, args.workers)
+    else:
+        with open(args.output, "w") as f:
+            bulk_score(source, f, args.model_dir, args.format, args.chunk_rows, args.workers)
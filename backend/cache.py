@@ -0,0 +1,100 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+class ResultCache:
+    """Bounded LRU/TTL cache of scoring results for repeated transactions.
+
+    Keys are a hash of the model version and the feature row rounded to
+    ``decimals`` places, so retried or replayed transactions are answered with a
+    lookup instead of an ensemble evaluation. ``max_entries=0`` disables it.
+    """
+
+    def __init__(self, max_entries=10000, ttl=300.0, decimals=6):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.decimals = decimals
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def keys(self, X, version):
+        # Quantize so float noise from serialization round-trips still hits; +0.0 folds -0.0 into 0.0
+        quantized = np.ascontiguousarray(np.round(X, self.decimals) + 0.0, dtype=np.float64)
+        prefix = version.encode()
+        return [hashlib.blake2b(prefix + row.tobytes(), digest_size=16).digest() for row in quantized]
+
+    def lookup(self, X, version):
+        """Cached result (or None) per row, plus the keys to store misses under."""
+        if not self.enabled:
+            return [None] * len(X), None
+        keys = self.keys(X, version)
+        now = time.monotonic()
+        results = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] < now:
+                    del self._entries[key]
+                    entry = None
+                if entry is None:
+                    self.misses += 1
+                    results.append(None)
+                else:
+                    self.hits += 1
+                    self._entries.move_to_end(key)
+                    # Copies, so a caller modifying its response cannot corrupt the cache
+                    results.append(dict(entry[1]))
+        return results, keys
+
+    def store(self, keys, results):
+        if not self.enabled:
+            return
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            for key, result in zip(keys, results):
+                self._entries[key] = (expires, dict(result))
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def score(self, X, version, score_fn):
+        """Score the rows of X, calling score_fn only on rows that are not cached."""
+        results, keys = self.lookup(X, version)
+        missing = [i for i, result in enumerate(results) if result is None]
+        if not missing:
+            return results
+        scored = score_fn(X[missing] if len(missing) < len(X) else X)
+        self.store([keys[i] for i in missing] if keys else None, scored)
+        for i, result in zip(missing, scored):
+            results[i] = result
+        return results
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_s": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
@@ -0,0 +1,161 @@
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+
+# Must match model_training/export_model.py
+FORMAT_VERSION = 1
+
+COMPILED_MODEL_FILE = "model_compiled.npz"
+# Pruned, reduced-precision copy written by model_training/compact_model.py
+COMPACT_MODEL_FILE = "model_compact.npz"
+MODEL_FILE = "model.pkl"
+
+
+class CompiledModel:
+    """NumPy evaluator for models exported by model_training/export_model.py.
+
+    Mirrors the sklearn classifier surface used by the backend (``classes_`` and
+    ``predict_proba``), so it can be passed wherever the pickled model was,
+    without importing sklearn.
+    """
+
+    classes_ = np.array([0, 1])
+
+    def __init__(self, arrays):
+        if int(arrays['format_version']) != FORMAT_VERSION:
+            raise ValueError(f"Unsupported compiled model format {int(arrays['format_version'])}")
+        self.kind = str(arrays['kind'])
+        self.x_dtype = np.dtype(str(arrays['x_dtype']))
+        self.feature_names = [str(name) for name in arrays['feature_names']]
+        self.scaler_params = {
+            'amount': (float(arrays['amount_mean']), float(arrays['amount_scale'])),
+            'time': (float(arrays['time_mean']), float(arrays['time_scale']))
+        }
+
+        if self.kind == 'linear':
+            self.coef = arrays['coef']
+            self.intercept = float(arrays['intercept'])
+        else:
+            self.feature = arrays['feature']
+            self.threshold = arrays['threshold']
+            self.left = arrays['left']
+            self.right = arrays['right']
+            self.value = arrays['value']
+            self.roots = arrays['roots']
+            self.max_depth = int(arrays['max_depth'])
+            if self.kind == 'boosting':
+                self.base = float(arrays['base'])
+                self.scale = float(arrays['scale'])
+
+        self.check_X = arrays['check_X'] if 'check_X' in arrays else None
+        self.check_proba = arrays['check_proba'] if 'check_proba' in arrays else None
+        self.arrays = arrays
+
+    @classmethod
+    def load(cls, path):
+        model = cls(load_arrays(path))
+        model.verify()
+        return model
+
+    @classmethod
+    def attach(cls, directory):
+        # Read-only memory maps of a layout written by publish(); pages are shared across processes
+        arrays = {}
+        for filename in os.listdir(directory):
+            if filename.endswith('.npy'):
+                arrays[filename[:-4]] = np.load(os.path.join(directory, filename), mmap_mode='r')
+        return cls(arrays)
+
+    def publish(self, directory):
+        """Write every array as its own .npy file so workers can attach() without copying."""
+        os.makedirs(directory, exist_ok=True)
+        for key, value in self.arrays.items():
+            np.save(os.path.join(directory, f"{key}.npy"), value)
+        return directory
+
+    def verify(self, atol=1e-6):
+        # Compare against the probabilities sklearn produced at export time
+        if self.check_X is None:
+            return
+        proba = self.predict_proba(self.check_X)[:, 1]
+        max_diff = float(np.abs(proba - self.check_proba).max())
+        if max_diff > atol:
+            raise ValueError(f"Compiled model disagrees with sklearn by {max_diff:.2e}")
+
+    def _leaf_values(self, X):
+        # Walk every tree for every row at once; leaves point to themselves
+        rows = np.arange(len(X))[:, None]
+        node = np.broadcast_to(self.roots, (len(X), len(self.roots)))
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        # Compact artifacts store values in reduced precision; sum them in float64
+        return np.asarray(self.value[node], dtype=np.float64)
+
+    def fraud_probability(self, X):
+        X = np.asarray(X, dtype=self.x_dtype)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if self.kind == 'linear':
+            raw = X @ self.coef + self.intercept
+        elif self.kind == 'forest':
+            return self._leaf_values(X).mean(axis=1)
+        else:
+            raw = self.base + self.scale * self._leaf_values(X).sum(axis=1)
+        return 1.0 / (1.0 + np.exp(-raw))
+
+    def predict_proba(self, X):
+        p = self.fraud_probability(X)
+        return np.column_stack([1.0 - p, p])
+
+    def predict(self, X):
+        return (self.fraud_probability(X) > 0.5).astype(int)
+
+
+def compiled_model_path(model_dir):
+    """Flat model to serve from model_dir, or None to fall back to model.pkl.
+
+    The compact artifact wins while it is at least as new as the model it was
+    made from; after retraining it is stale and the fresh export is used.
+    """
+    compact_path = os.path.join(model_dir, COMPACT_MODEL_FILE)
+    compiled_path = os.path.join(model_dir, COMPILED_MODEL_FILE)
+    if os.path.exists(compact_path):
+        newer = [path for path in (compiled_path, os.path.join(model_dir, MODEL_FILE))
+                 if os.path.exists(path) and os.path.getmtime(path) > os.path.getmtime(compact_path)]
+        if not newer:
+            return compact_path
+    return compiled_path if os.path.exists(compiled_path) else None
+
+
+def load_arrays(path):
+    with np.load(path) as npz:
+        return {key: npz[key] for key in npz.files}
+
+
+def compiled_arrays(model_dir):
+    """Flat model arrays from model_compact.npz/model_compiled.npz, or exported on the fly from model.pkl."""
+    compiled_path = compiled_model_path(model_dir)
+    if compiled_path is not None:
+        return load_arrays(compiled_path)
+
+    # Only the process publishing the model unpickles sklearn; workers attach to the flat arrays
+    import joblib
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "model_training"))
+    from export_model import export_model
+
+    model = joblib.load(os.path.join(model_dir, MODEL_FILE))
+    path = os.path.join(tempfile.mkdtemp(), COMPILED_MODEL_FILE)
+    export_model(
+        model,
+        joblib.load(os.path.join(model_dir, "feature_names.pkl")),
+        joblib.load(os.path.join(model_dir, "scaler_amount.pkl")),
+        joblib.load(os.path.join(model_dir, "scaler_time.pkl")),
+        path
+    )
+    arrays = load_arrays(path)
+    shutil.rmtree(os.path.dirname(path))
+    return arrays
@@ -0,0 +1,20 @@
+import os
+
+# Defaults are resolved from this file, not the working directory, so the API
+# starts from anywhere; deployments point them elsewhere with the variables below
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BACKEND_DIR)
+
+# Trained artifacts (model.pkl / model_compiled.npz / scalers / feature names)
+MODEL_DIR = os.environ.get("FRAUD_MODEL_DIR", os.path.join(REPO_DIR, "model_training"))
+# Optional challenger scored in shadow next to the primary (same artifact layout), and its logs
+CHALLENGER_DIR = os.environ.get("FRAUD_CHALLENGER_DIR", os.path.join(MODEL_DIR, "challenger"))
+SHADOW_LOG_DIR = os.environ.get("FRAUD_SHADOW_LOG_DIR", os.path.join(REPO_DIR, "logs", "shadow"))
+# Set by serve.py: the model was published once as memory-mappable arrays for all workers
+SHARED_MODEL_DIR = os.environ.get("FRAUD_MODEL_SHARED_DIR")
+
+# Dataset behind /data-insights and the snapshot of its aggregates
+DATA_PATH = os.environ.get("FRAUD_DATA_PATH", os.path.join(REPO_DIR, "data", "creditcard.csv"))
+INSIGHTS_SNAPSHOT_PATH = os.environ.get(
+    "FRAUD_INSIGHTS_SNAPSHOT", os.path.join(os.path.dirname(DATA_PATH), "insights_snapshot.json")
+)
@@ -0,0 +1,66 @@
+import json
+
+import numpy as np
+
+# Little-endian float layouts accepted as application/octet-stream bodies
+BINARY_DTYPES = {"float32": np.dtype("<f4"), "float64": np.dtype("<f8")}
+
+
+class UnsupportedMediaType(ValueError):
+    pass
+
+
+def binary_dtype(content_type):
+    """Element type of an octet-stream body from its ``dtype=`` media type parameter.
+
+    ``application/octet-stream; dtype=float32`` selects float32; float64 is the
+    default when the parameter is absent.
+    """
+    for param in content_type.split(";")[1:]:
+        key, _, value = param.strip().partition("=")
+        if key.strip().lower() == "dtype":
+            value = value.strip().strip('"').lower()
+            if value not in BINARY_DTYPES:
+                raise ValueError(f"Unsupported dtype '{value}', expected one of {sorted(BINARY_DTYPES)}")
+            return BINARY_DTYPES[value]
+    return BINARY_DTYPES["float64"]
+
+
+def decode_binary(body, n_features, dtype):
+    """View a packed little-endian float buffer as a (rows, n_features) matrix.
+
+    No copy is made: the array is a read-only view over the request body.
+    """
+    row_bytes = dtype.itemsize * n_features
+    if len(body) == 0 or len(body) % row_bytes:
+        raise ValueError(f"Body must hold whole rows of {n_features} {dtype.name} values "
+                         f"({row_bytes} bytes each), got {len(body)} bytes")
+    return np.frombuffer(body, dtype=dtype).reshape(-1, n_features)
+
+
+def decode_positional(body, n_features):
+    """Parse a positional JSON array into a float64 matrix.
+
+    Accepts a single row ``[v1, ..., vn]`` or a list of rows, skipping the
+    per-field validation of the named JSON format.
+    """
+    try:
+        X = np.asarray(json.loads(body), dtype=np.float64)
+    except (TypeError, ValueError):
+        raise ValueError("Body must be a JSON array of numbers or of equal-length rows")
+    if X.ndim == 1:
+        X = X.reshape(1, -1)
+    if X.ndim != 2 or X.shape[1] != n_features or len(X) == 0:
+        raise ValueError(f"Each row must have {n_features} values")
+    return X
+
+
+def decode_rows(body, content_type, n_features):
+    # Dispatch on the media type: packed floats or a positional JSON array
+    media_type = content_type.split(";")[0].strip().lower()
+    if media_type == "application/octet-stream":
+        return decode_binary(body, n_features, binary_dtype(content_type))
+    if media_type in ("application/json", ""):
+        return decode_positional(body, n_features)
+    raise UnsupportedMediaType(f"Unsupported content type '{media_type}', "
+                               "use application/octet-stream or application/json")
@@ -0,0 +1,127 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+from scoring import raw_feature_order
+
+# Written next to feature_names.pkl by model_training/reference_profile.py
+PROFILE_FILE = "reference_profile.npz"
+PROFILE_FORMAT_VERSION = 1
+
+# Conventional PSI cut-offs: below 0.1 stable, up to 0.25 a moderate shift, above that drift
+PSI_SHIFT = 0.1
+PSI_DRIFT = 0.25
+# Empty bins are counted as this proportion so PSI stays finite
+PSI_FLOOR = 1e-4
+
+
+def psi(live, reference):
+    """Population stability index per row of two count matrices with the same bins."""
+    live = np.maximum(live / np.maximum(live.sum(axis=-1, keepdims=True), 1), PSI_FLOOR)
+    reference = np.maximum(reference / np.maximum(reference.sum(axis=-1, keepdims=True), 1), PSI_FLOOR)
+    return ((live - reference) * np.log(live / reference)).sum(axis=-1)
+
+
+def ks(live, reference):
+    """Largest CDF gap at the bin edges: the Kolmogorov-Smirnov statistic of the binned data."""
+    live_cdf = np.cumsum(live, axis=-1) / np.maximum(live.sum(axis=-1, keepdims=True), 1)
+    reference_cdf = np.cumsum(reference, axis=-1) / np.maximum(reference.sum(axis=-1, keepdims=True), 1)
+    return np.abs(live_cdf - reference_cdf).max(axis=-1)
+
+
+def drift_status(value):
+    return "drift" if value > PSI_DRIFT else "shift" if value > PSI_SHIFT else "stable"
+
+
+class DriftMonitor:
+    """Streaming histograms of live model inputs and fraud scores, on the reference bins.
+
+    The reference profile bins every feature at its training quantiles, so the
+    live counts double as a quantile sketch: each bin should keep its share of
+    the rows. Memory is one small count matrix however much traffic is seen,
+    and an update bins a batch with a few vectorized comparisons.
+    """
+
+    def __init__(self, profile):
+        self.feature_names = [str(name) for name in profile['feature_names']]
+        self.edges = profile['edges']
+        self.reference = profile['counts']
+        self.score_edges = profile['score_edges']
+        self.score_reference = profile['score_counts']
+        n_features, n_bins = self.reference.shape
+        # Offset of each feature's bins in the flattened count matrix
+        self._offsets = np.arange(n_features) * n_bins
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counts = np.zeros_like(self.reference)
+            self.score_counts = np.zeros_like(self.score_reference)
+            self.rows = 0
+            self.since = time.time()
+
+    def observe_inputs(self, X_raw):
+        """Add raw rows in feature_names order (unscaled amount/time)."""
+        bins = (X_raw[:, :, None] >= self.edges[None]).sum(axis=2) + self._offsets
+        counts = np.bincount(bins.ravel(), minlength=self.reference.size).reshape(self.reference.shape)
+        with self._lock:
+            self.counts += counts
+            self.rows += len(X_raw)
+
+    def observe_scores(self, fraud_prob):
+        """Add fraud probabilities (%) of scored rows."""
+        bins = np.searchsorted(self.score_edges, fraud_prob, side='right')
+        counts = np.bincount(bins, minlength=len(self.score_reference))
+        with self._lock:
+            self.score_counts += counts
+
+    def report(self, min_rows=100):
+        """PSI and binned KS of every feature and of the score against the reference."""
+        with self._lock:
+            counts, score_counts, rows, since = self.counts.copy(), self.score_counts.copy(), self.rows, self.since
+        feature_psi, feature_ks = psi(counts, self.reference), ks(counts, self.reference)
+        score_psi = float(psi(score_counts, self.score_reference))
+        score_ks = float(ks(score_counts, self.score_reference))
+        names = raw_feature_order(self.feature_names)
+        features = {
+            name: {"psi": round(float(p), 4), "ks": round(float(k), 4), "status": drift_status(p)}
+            for name, p, k in zip(names, feature_psi, feature_ks)
+        }
+        worst = max(score_psi, float(feature_psi.max()))
+        return {
+            "rows": rows,
+            "since": since,
+            "status": "insufficient_data" if rows < min_rows else drift_status(worst),
+            "score": {"psi": round(score_psi, 4), "ks": round(score_ks, 4), "status": drift_status(score_psi)},
+            "most_drifted": [names[j] for j in np.argsort(-feature_psi)[:5]],
+            "features": features
+        }
+
+    def max_psi(self):
+        # Largest feature PSI and the score PSI, for the /metrics gauges
+        with self._lock:
+            counts, score_counts = self.counts.copy(), self.score_counts.copy()
+        return float(psi(counts, self.reference).max()), float(psi(score_counts, self.score_reference))
+
+
+def load_monitor(model_dir, feature_names):
+    """DriftMonitor for the reference profile in model_dir, or None if there is no usable one.
+
+    The profile must describe the model's exact inputs; one left over from a
+    model with other features is ignored.
+    """
+    path = os.path.join(model_dir, PROFILE_FILE)
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as npz:
+        profile = {key: npz[key] for key in npz.files}
+    if int(profile['format_version']) != PROFILE_FORMAT_VERSION:
+        print(f"Ignoring {path}: unsupported format {int(profile['format_version'])}")
+        return None
+    if [str(name) for name in profile['feature_names']] != list(feature_names):
+        print(f"Ignoring {path}: profile features do not match the model")
+        return None
+    return DriftMonitor(profile)
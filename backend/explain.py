@@ -0,0 +1,169 @@
+import numpy as np
+
+from scoring import apply_rules, raw_feature_order, scale_matrix
+
+
+def _node_depths(left, right, roots, max_depth):
+    # Depth of every node, top-down from the roots (leaves point to themselves)
+    depth = np.full(len(left), -1, dtype=np.int64)
+    frontier = np.asarray(roots, dtype=np.int64)
+    for level in range(max_depth + 1):
+        depth[frontier] = level
+        internal = frontier[left[frontier] != frontier]
+        frontier = np.concatenate([left[internal], right[internal]])
+    return depth
+
+
+class TreeExplainer:
+    """Exact per-feature contributions of a flat tree ensemble (path decomposition).
+
+    Every node gets an expected value: leaves their own value, splits the
+    cover-weighted mean of their children (equal weights for exports without
+    ``cover``). Moving from a split to a child changes the expectation by
+    ``delta[child]``, credited to the split's feature. Both tables are built
+    once when the model loads; an explanation is then one traversal like
+    ``predict_proba`` plus a gather per level. The contributions plus the
+    expected value of the roots telescope to the model output exactly.
+    """
+
+    def __init__(self, arrays, n_features):
+        self.kind = str(arrays['kind'])
+        self.x_dtype = np.dtype(str(arrays['x_dtype']))
+        self.feature = np.asarray(arrays['feature'], dtype=np.int64)
+        self.threshold = arrays['threshold']
+        self.left = np.asarray(arrays['left'], dtype=np.int64)
+        self.right = np.asarray(arrays['right'], dtype=np.int64)
+        self.roots = np.asarray(arrays['roots'], dtype=np.int64)
+        self.max_depth = int(arrays['max_depth'])
+        self.n_features = n_features
+        if self.kind == 'boosting':
+            self.base, self.scale = float(arrays['base']), float(arrays['scale'])
+
+        node_ids = np.arange(len(self.left))
+        is_leaf = self.left == node_ids
+        cover = np.asarray(arrays['cover'], dtype=np.float64) if 'cover' in arrays else np.ones(len(self.left))
+        expected = np.where(is_leaf, np.asarray(arrays['value'], dtype=np.float64), 0.0)
+        depth = _node_depths(self.left, self.right, self.roots, self.max_depth)
+        for level in range(self.max_depth - 1, -1, -1):
+            nodes = node_ids[(depth == level) & ~is_leaf]
+            left_cover, right_cover = cover[self.left[nodes]], cover[self.right[nodes]]
+            total = left_cover + right_cover
+            # Uncovered splits (e.g. zero-weight branches) fall back to the plain mean
+            weight = np.divide(left_cover, total, out=np.full(len(nodes), 0.5), where=total > 0)
+            expected[nodes] = weight * expected[self.left[nodes]] + (1 - weight) * expected[self.right[nodes]]
+
+        # delta[child] = E[child] - E[parent]; leaves' self-loops and roots contribute nothing
+        parent = np.full(len(self.left), -1, dtype=np.int64)
+        internal = node_ids[~is_leaf]
+        parent[self.left[internal]] = internal
+        parent[self.right[internal]] = internal
+        self.delta = np.where(parent >= 0, expected - expected[np.maximum(parent, 0)], 0.0)
+        self.is_internal = ~is_leaf
+        self.root_expected = expected[self.roots]
+
+    def explain(self, X):
+        """(base value, contributions (rows, features), model output) for scaled rows X.
+
+        Forests are explained in fraud probability (%), boosting in log-odds.
+        """
+        X = np.asarray(X, dtype=self.x_dtype)
+        n_rows, n_trees = len(X), len(self.roots)
+        rows = np.arange(n_rows)[:, None]
+        # Flat (row, feature) cell each step's contribution is added to
+        row_offset = rows * self.n_features
+        contributions = np.zeros(n_rows * self.n_features)
+        node = np.broadcast_to(self.roots, (n_rows, n_trees))
+        for _ in range(self.max_depth):
+            feature = self.feature[node]
+            go_left = X[rows, feature] <= self.threshold[node]
+            child = np.where(go_left, self.left[node], self.right[node])
+            step = np.where(self.is_internal[node], self.delta[child], 0.0)
+            contributions += np.bincount((row_offset + feature).ravel(), weights=step.ravel(),
+                                         minlength=len(contributions))
+            node = child
+        contributions = contributions.reshape(n_rows, self.n_features)
+
+        if self.kind == 'forest':
+            contributions *= 100 / n_trees
+            base = float(self.root_expected.mean()) * 100
+        else:
+            contributions *= self.scale
+            base = self.base + self.scale * float(self.root_expected.sum())
+        return base, contributions, base + contributions.sum(axis=1)
+
+
+class LinearExplainer:
+    """Coefficient x scaled value per feature, in log-odds, on top of the intercept."""
+
+    kind = 'linear'
+
+    def __init__(self, arrays):
+        self.coef = np.asarray(arrays['coef'], dtype=np.float64)
+        self.intercept = float(arrays['intercept'])
+
+    def explain(self, X):
+        contributions = np.asarray(X, dtype=np.float64) * self.coef
+        return self.intercept, contributions, self.intercept + contributions.sum(axis=1)
+
+
+def build_explainer(model, n_features):
+    """Explainer for a served model, or None for model types that cannot be explained.
+
+    Compiled models are explained from their own arrays. A pickled sklearn
+    model is flattened with the training scripts' exporter first, which only
+    works when model_training/ is importable (it is for the API).
+    """
+    arrays = getattr(model, 'arrays', None)
+    if arrays is None:
+        try:
+            from export_model import flatten_model
+
+            arrays = flatten_model(model)
+        except (ImportError, TypeError, ValueError):
+            return None
+    if str(arrays['kind']) == 'linear':
+        return LinearExplainer(arrays)
+    return TreeExplainer(arrays, n_features)
+
+
+def fraud_probability(explainer, output):
+    # Model output in the explainer's units -> fraud probability (%)
+    if explainer.kind == 'forest':
+        return output
+    return 100 / (1 + np.exp(-output))
+
+
+def explain_matrix(explainer, X_raw, feature_names, params, rules, top=10):
+    """Explain raw rows (feature_names order, unscaled amount/time) in one pass.
+
+    Each result has the decision (rules included), the fraud probability and
+    the ``top`` largest contributions by magnitude (all when ``top`` is 0),
+    keyed by request field name. The contributions plus ``base_value`` add up
+    to the model output in ``units``.
+    """
+    if not X_raw.flags.writeable:
+        X_raw = X_raw.copy()
+    amount_idx, time_idx = params[0]
+    amount = X_raw[:, amount_idx].copy()
+    time_ = X_raw[:, time_idx].copy()
+    base, contributions, output = explainer.explain(scale_matrix(X_raw, params))
+    fraud_prob = fraud_probability(explainer, output)
+    is_fraud = apply_rules(fraud_prob, amount, time_, rules)
+
+    names = raw_feature_order(feature_names)
+    order = np.argsort(-np.abs(contributions), axis=1, kind='stable')
+    if top:
+        order = order[:, :top]
+    results = [
+        {
+            "prediction": "Fraud" if flagged else "Legitimate",
+            "fraud_probability": round(float(prob), 2),
+            "contributions": {names[j]: round(float(row[j]), 4) for j in row_order}
+        }
+        for flagged, prob, row, row_order in zip(is_fraud.tolist(), fraud_prob, contributions, order)
+    ]
+    return {
+        "units": "probability_percent" if explainer.kind == 'forest' else "log_odds",
+        "base_value": round(float(base), 4),
+        "results": results
+    }
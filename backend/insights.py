@@ -0,0 +1,169 @@
+import json
+import os
+import threading
+
+import numpy as np
+
+HOURS = 24
+# Fraud amount buckets reported by /data-insights: <= 10, (10, 100], > 100
+LOW_AMOUNT = 10
+MEDIUM_AMOUNT = 100
+
+
+def source_signature(path):
+    # Cheap identity of the source CSV used to decide whether a snapshot is stale
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime": stat.st_mtime}
+
+
+class InsightsStore:
+    """Running aggregates behind /data-insights.
+
+    Everything the endpoint reports is derived from counters and sums, so new
+    labelled transactions can be folded in without touching the dataset again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.source = None
+        self.total = 0
+        self.fraud = 0
+        self.amount_sum = 0.0
+        self.fraud_amount_sum = 0.0
+        self.time_sum = 0.0
+        self.max_amount = None
+        self.min_amount = None
+        self.fraud_by_hour = [0] * HOURS
+        self.legit_by_hour = [0] * HOURS
+        self.fraud_amount_buckets = [0, 0, 0]
+
+    def add(self, amount, time, label):
+        """Fold in a batch of labelled transactions (array-likes of equal length)."""
+        amount = np.asarray(amount, dtype=np.float64)
+        time = np.asarray(time, dtype=np.float64)
+        is_fraud = np.asarray(label).astype(bool)
+        if len(amount) == 0:
+            return
+
+        hours = (time / 3600).astype(int) % HOURS
+        fraud_amounts = amount[is_fraud]
+        fraud_hours = np.bincount(hours[is_fraud], minlength=HOURS)
+        legit_hours = np.bincount(hours[~is_fraud], minlength=HOURS)
+        buckets = [
+            int((fraud_amounts <= LOW_AMOUNT).sum()),
+            int(((fraud_amounts > LOW_AMOUNT) & (fraud_amounts <= MEDIUM_AMOUNT)).sum()),
+            int((fraud_amounts > MEDIUM_AMOUNT).sum())
+        ]
+
+        with self._lock:
+            self.total += len(amount)
+            self.fraud += int(is_fraud.sum())
+            self.amount_sum += float(amount.sum())
+            self.fraud_amount_sum += float(fraud_amounts.sum())
+            self.time_sum += float(time.sum())
+            batch_max, batch_min = float(amount.max()), float(amount.min())
+            self.max_amount = batch_max if self.max_amount is None else max(self.max_amount, batch_max)
+            self.min_amount = batch_min if self.min_amount is None else min(self.min_amount, batch_min)
+            for hour in range(HOURS):
+                self.fraud_by_hour[hour] += int(fraud_hours[hour])
+                self.legit_by_hour[hour] += int(legit_hours[hour])
+            for i, count in enumerate(buckets):
+                self.fraud_amount_buckets[i] += count
+
+    def summary(self):
+        """Build the /data-insights response from the running aggregates."""
+        with self._lock:
+            if self.total == 0:
+                raise ValueError("No transactions loaded")
+
+            legit = self.total - self.fraud
+            legit_amount_sum = self.amount_sum - self.fraud_amount_sum
+            fraud_by_hour = {h: c for h, c in enumerate(self.fraud_by_hour) if c}
+            legit_by_hour = {h: c for h, c in enumerate(self.legit_by_hour) if c}
+            # Same ordering as Series.nlargest on an hour-sorted index
+            top_hours = sorted(fraud_by_hour.items(), key=lambda item: (-item[1], item[0]))[:5]
+
+            return {
+                "overview": {
+                    "total_transactions": int(self.total),
+                    "fraud_count": int(self.fraud),
+                    "legitimate_count": int(legit),
+                    "fraud_rate": round(self.fraud / self.total * 100, 2)
+                },
+                "amount_stats": {
+                    "average_transaction": round(self.amount_sum / self.total, 2),
+                    "max_transaction": round(self.max_amount, 2),
+                    "min_transaction": round(self.min_amount, 2),
+                    "avg_fraud_amount": round(self.fraud_amount_sum / self.fraud, 2) if self.fraud else 0.0,
+                    "avg_legit_amount": round(legit_amount_sum / legit, 2) if legit else 0.0
+                },
+                "time_patterns": {
+                    "average_time": round(self.time_sum / self.total, 2),
+                    "top_fraud_hours": dict(top_hours),
+                    "fraud_by_hour": fraud_by_hour,
+                    "legit_by_hour": legit_by_hour
+                },
+                "fraud_distribution": {
+                    "low_amount": self.fraud_amount_buckets[0],
+                    "medium_amount": self.fraud_amount_buckets[1],
+                    "high_amount": self.fraud_amount_buckets[2]
+                }
+            }
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "source": self.source,
+                "total": self.total,
+                "fraud": self.fraud,
+                "amount_sum": self.amount_sum,
+                "fraud_amount_sum": self.fraud_amount_sum,
+                "time_sum": self.time_sum,
+                "max_amount": self.max_amount,
+                "min_amount": self.min_amount,
+                "fraud_by_hour": list(self.fraud_by_hour),
+                "legit_by_hour": list(self.legit_by_hour),
+                "fraud_amount_buckets": list(self.fraud_amount_buckets)
+            }
+
+    @classmethod
+    def from_dict(cls, state):
+        store = cls()
+        for key, value in state.items():
+            setattr(store, key, value)
+        return store
+
+    def save(self, path):
+        # Write to a temporary file first so a crash never leaves a torn snapshot
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+    @classmethod
+    def from_dataset(cls, data_path):
+        # Reads the memory-mapped columnar cache shared with the training scripts
+        from dataset import load_dataset
+
+        data = load_dataset(data_path)
+        store = cls()
+        store.add(data.amount, data.time, data.label)
+        store.source = source_signature(data_path)
+        return store
+
+
+def load_insights(data_path, snapshot_path):
+    """Load the persisted snapshot if it matches the CSV, otherwise rebuild and persist it."""
+    if os.path.exists(snapshot_path):
+        store = InsightsStore.load(snapshot_path)
+        if not os.path.exists(data_path) or store.source == source_signature(data_path):
+            return store
+
+    store = InsightsStore.from_dataset(data_path)
+    store.save(snapshot_path)
+    return store
@@ -1,14 +1,55 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-import joblib
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 import numpy as np
-import pandas as pd
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, List, Optional
 import os
-from collections import Counter
+import sys
+import threading
+import time
+import asyncio
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from config import CHALLENGER_DIR, DATA_PATH, INSIGHTS_SNAPSHOT_PATH, MODEL_DIR, SHADOW_LOG_DIR, SHARED_MODEL_DIR
+from insights import InsightsStore, load_insights
+from bulk_score import OUTPUT_FORMATS, CsvChunker, Progress, check_header, csv_header, score_frame
+from cache import ResultCache
+from decoding import UnsupportedMediaType, decode_rows
+from batcher import BATCH_SIZE_BUCKETS, QUEUE_DELAY_BUCKETS_MS, MicroBatcher
+from metrics import ERRORS, REQUEST_LATENCY, REQUESTS, STAGE_LATENCY, render_all, render_histogram, timed
+from profiler import SamplingProfiler
+from registry import ModelRegistry
+from scoring import assemble_matrix, raw_feature_order
+from shadow import ShadowScorer
 
-app = FastAPI()
+# Modules shared with the training scripts (dataset cache, ...) live in model_training/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "model_training"))
+
+from velocity import VELOCITY_FEATURES, VelocityStore, first_seen_features
+
+# Time-to-ready is measured from here (module import, i.e. worker boot)
+STARTED_AT = time.perf_counter()
+
+@asynccontextmanager
+async def lifespan(app):
+    # Artifacts load on a worker thread while the server already accepts connections:
+    # /health/live answers immediately, /health/ready and scoring once the model is warm
+    app.state.model_loading = asyncio.get_running_loop().run_in_executor(None, load_model)
+    try:
+        yield
+    finally:
+        registry.stop_watching()
+        challenger_registry.stop_watching()
+        shadow_scorer.stop()
+        bulk_executor.shutdown(wait=False)
+        # Persist incremental /data-insights updates so a restart does not lose them
+        if insights_store is not None:
+            insights_store.save(INSIGHTS_SNAPSHOT_PATH)
+
+app = FastAPI(lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -19,26 +60,88 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Load the trained model and scalers
-model_path = os.path.join("..", "model_training", "model.pkl")
-scaler_amount_path = os.path.join("..", "model_training", "scaler_amount.pkl")
-scaler_time_path = os.path.join("..", "model_training", "scaler_time.pkl")
-feature_names_path = os.path.join("..", "model_training", "feature_names.pkl")
-
-try:
-    model = joblib.load(model_path)
-    scaler_amount = joblib.load(scaler_amount_path)
-    scaler_time = joblib.load(scaler_time_path)
-    feature_names = joblib.load(feature_names_path)
-    print("Model and scalers loaded successfully")
-    print(f"Feature names: {feature_names[:5]}...")  # Show first 5 features
-except FileNotFoundError as e:
-    print(f"Error loading model: {e}")
-    raise
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    # Handlers read received_at to time body decoding and validation
+    request.state.received_at = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        endpoint = route.path if route is not None else "unmatched"
+        REQUEST_LATENCY.observe(time.perf_counter() - request.state.received_at, endpoint)
+        REQUESTS.inc(1, endpoint, str(status))
+        if status >= 500:
+            ERRORS.inc(1, endpoint)
+
+# The trained model and scalers are loaded through the registry, which can hot-swap them later
+registry = ModelRegistry(MODEL_DIR, shared_dir=SHARED_MODEL_DIR)
+# Seconds from worker boot until the first model was loaded and warmed up
+model_ready_s = None
+
+# Optional challenger (CHALLENGER_DIR): scores live rows in shadow, logging both scores;
+# SHADOW_MAX_QUEUED_ROWS bounds the rows waiting for it, beyond which rows are shed
+challenger_registry = ModelRegistry(CHALLENGER_DIR)
+shadow_scorer = ShadowScorer(SHADOW_LOG_DIR, max_queued_rows=int(os.environ.get("SHADOW_MAX_QUEUED_ROWS", "10000")))
+
+def load_model():
+    # Runs on a thread started by the lifespan hook
+    global model_ready_s
+    try:
+        bundle = registry.load()
+    except Exception as e:
+        registry.last_error = f"{type(e).__name__}: {e}"
+        print(f"Error loading model: {e}")
+        return
+    model_ready_s = time.perf_counter() - STARTED_AT
+    print(f"Model loaded successfully (version {bundle.version} from {bundle.source}) "
+          f"{model_ready_s:.2f}s after startup")
+    print(f"Feature names: {bundle.feature_names[:5]}...")  # Show first 5 features
+
+    # Poll the model directory for new artifacts every MODEL_WATCH_INTERVAL seconds (0 disables)
+    watch_interval = float(os.environ.get("MODEL_WATCH_INTERVAL", "0"))
+    registry.start_watching(watch_interval)
+
+    if os.path.isdir(CHALLENGER_DIR):
+        # A broken challenger never affects serving; it is reported by /admin/shadow
+        try:
+            challenger = challenger_registry.load()
+        except Exception as e:
+            challenger_registry.last_error = f"{type(e).__name__}: {e}"
+            print(f"Error loading challenger model: {e}")
+            return
+        shadow_scorer.start()
+        challenger_registry.start_watching(watch_interval)
+        print(f"Challenger loaded (version {challenger.version} from {challenger.source}), scoring in shadow")
+
+def current_bundle():
+    # Requests that arrive while the lifespan hook is still loading get a retryable 503
+    bundle = registry.current
+    if bundle is None:
+        raise HTTPException(status_code=503, detail="Model not loaded yet", headers={"Retry-After": "1"})
+    return bundle
+
+# /data-insights aggregates are built (or read from the persisted snapshot) on first use,
+# so neither the dataset nor pandas is touched at startup
+insights_store = None
+insights_lock = threading.Lock()
+
+def get_insights_store():
+    global insights_store
+    with insights_lock:
+        if insights_store is None:
+            insights_store = load_insights(DATA_PATH, INSIGHTS_SNAPSHOT_PATH)
+            print(f"Data insights ready ({insights_store.total} transactions)")
+        return insights_store
 
 class PredictionRequest(BaseModel):
     amount: float
     time: float
+    # Optional card/account id; enables the per-card velocity features
+    card_id: Optional[str] = None
     V1: Optional[float] = 0.0
     V2: Optional[float] = 0.0
     V3: Optional[float] = 0.0
@@ -68,147 +171,421 @@ class PredictionRequest(BaseModel):
     V27: Optional[float] = 0.0
     V28: Optional[float] = 0.0
 
+class LabelledTransactions(BaseModel):
+    amount: List[float]
+    time: List[float]
+    label: List[int]
+
+class BatchPredictionRequest(BaseModel):
+    # Either columnar: {"amount": [...], "time": [...], "V1": [...], ...}
+    columns: Optional[Dict[str, List[float]]] = None
+    # Or row arrays in feature_names order with raw amount/time, see GET /predict/batch/schema
+    rows: Optional[List[List[float]]] = None
+
 @app.get("/")
 def home():
     return {"status": "Fraud Detection API Running"}
 
+@app.get("/health/live")
+def liveness():
+    # The process is up and serving HTTP, whether or not the model has loaded
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+def readiness():
+    # Route traffic here only once the model is loaded and warmed up
+    bundle = registry.current
+    if bundle is None:
+        status = "failed" if registry.last_error else "loading"
+        return JSONResponse(status_code=503, content={"status": status, "error": registry.last_error})
+    return {"status": "ready", "version": bundle.version, "ready_after_s": model_ready_s}
+
 @app.get("/data-insights")
 def get_data_insights():
     try:
-        # Load the credit card data
-        data_path = os.path.join("..", "data", "creditcard.csv")
-        df = pd.read_csv(data_path)
-        
-        # Basic statistics
-        total_transactions = len(df)
-        fraud_count = df["Class"].sum()
-        legitimate_count = total_transactions - fraud_count
-        fraud_rate = (fraud_count / total_transactions) * 100
-        
-        # Amount statistics
-        avg_amount = df["Amount"].mean()
-        max_amount = df["Amount"].max()
-        min_amount = df["Amount"].min()
-        
-        # Time statistics
-        avg_time = df["Time"].mean()
-        
-        # Fraud vs Legitimate amount comparison
-        fraud_amounts = df[df["Class"] == 1]["Amount"]
-        legit_amounts = df[df["Class"] == 0]["Amount"]
-        
-        avg_fraud_amount = fraud_amounts.mean()
-        avg_legit_amount = legit_amounts.mean()
-        
-        # Time-based patterns
-        df["Hour"] = (df["Time"] / 3600).astype(int) % 24
-        fraud_by_hour = df[df["Class"] == 1]["Hour"].value_counts().sort_index()
-        legit_by_hour = df[df["Class"] == 0]["Hour"].value_counts().sort_index()
-        
-        # Top 5 hours with most fraud
-        top_fraud_hours = fraud_by_hour.nlargest(5).to_dict()
-        
-        # Amount distribution insights
-        low_amount_fraud = len(fraud_amounts[fraud_amounts <= 10])
-        medium_amount_fraud = len(fraud_amounts[(fraud_amounts > 10) & (fraud_amounts <= 100)])
-        high_amount_fraud = len(fraud_amounts[fraud_amounts > 100])
-        
-        # Return comprehensive insights
-        return {
-            "overview": {
-                "total_transactions": int(total_transactions),
-                "fraud_count": int(fraud_count),
-                "legitimate_count": int(legitimate_count),
-                "fraud_rate": round(float(fraud_rate), 2)
-            },
-            "amount_stats": {
-                "average_transaction": round(float(avg_amount), 2),
-                "max_transaction": round(float(max_amount), 2),
-                "min_transaction": round(float(min_amount), 2),
-                "avg_fraud_amount": round(float(avg_fraud_amount), 2),
-                "avg_legit_amount": round(float(avg_legit_amount), 2)
-            },
-            "time_patterns": {
-                "average_time": round(float(avg_time), 2),
-                "top_fraud_hours": top_fraud_hours,
-                "fraud_by_hour": fraud_by_hour.to_dict(),
-                "legit_by_hour": legit_by_hour.to_dict()
-            },
-            "fraud_distribution": {
-                "low_amount": int(low_amount_fraud),
-                "medium_amount": int(medium_amount_fraud),
-                "high_amount": int(high_amount_fraud)
-            }
-        }
-    except Exception as e:
-        print(f"Error getting data insights: {e}")
-        raise HTTPException(status_code=500, detail=f"Data insights error: {str(e)}")
+        store = get_insights_store()
+    except FileNotFoundError:
+        raise HTTPException(status_code=503, detail="Data insights unavailable: dataset not found")
+    try:
+        with timed("insights_summary"):
+            return store.summary()
+    except ValueError as e:
+        raise HTTPException(status_code=503, detail=f"Data insights unavailable: {str(e)}")
+
+@app.post("/data-insights/transactions")
+def add_labelled_transactions(request: LabelledTransactions):
+    global insights_store
+    if not (len(request.amount) == len(request.time) == len(request.label)):
+        raise HTTPException(status_code=422, detail="amount, time and label must have the same length")
+    try:
+        store = get_insights_store()
+    except FileNotFoundError:
+        with insights_lock:
+            if insights_store is None:
+                insights_store = InsightsStore()
+            store = insights_store
+    store.add(request.amount, request.time, request.label)
+    return {"added": len(request.amount), "total_transactions": store.total}
+
+def score_live(bundle, X):
+    # Request-path scoring feeds the drift monitor and the shadow challenger (bulk uploads
+    # do neither); inputs are binned and copied first because score() scales X in place
+    challenger = challenger_registry.current
+    X_shadow = X.copy() if challenger is not None else None
+    if bundle.drift is not None:
+        bundle.drift.observe_inputs(X)
+    results, fraud_prob = bundle.score(X, return_probabilities=True)
+    if bundle.drift is not None:
+        bundle.drift.observe_scores(fraud_prob)
+    if challenger is not None:
+        # Only queued here; scored and logged on the shadow thread after the response
+        shadow_scorer.submit(bundle, challenger, X_shadow, results, fraud_prob)
+    return results
+
+# Concurrent /predict calls are scored together in micro-batches
+# (PREDICT_BATCH_WINDOW_MS=0 scores whatever is queued without waiting)
+predict_batcher = MicroBatcher(
+    score_live,
+    window_ms=float(os.environ.get("PREDICT_BATCH_WINDOW_MS", "2")),
+    max_rows=int(os.environ.get("PREDICT_BATCH_MAX_ROWS", "256")),
+    max_in_flight=int(os.environ.get("PREDICT_BATCH_MAX_IN_FLIGHT", "4"))
+)
+
+# Repeated transactions (gateway retries, reconciliation replays) are answered from here;
+# RESULT_CACHE_SIZE=0 disables it. Entries are dropped whenever a new model is swapped in.
+result_cache = ResultCache(
+    max_entries=int(os.environ.get("RESULT_CACHE_SIZE", "10000")),
+    ttl=float(os.environ.get("RESULT_CACHE_TTL", "300"))
+)
+registry.swap_listeners.append(lambda previous, bundle: result_cache.clear())
+
+async def score_one(bundle, X):
+    # Single row: cache lookup first, then the micro-batcher on a miss
+    cached, keys = result_cache.lookup(X, bundle.version)
+    if cached[0] is not None:
+        return cached[0]
+    result = await predict_batcher.submit(X, key=bundle)
+    result_cache.store(keys, [result])
+    return result
+
+def score_many(bundle, X):
+    return result_cache.score(X, bundle.version, lambda X: score_live(bundle, X))
+
+# Per-card sliding-window history for velocity features (least recently seen cards evicted)
+velocity_store = VelocityStore(max_cards=int(os.environ.get("VELOCITY_MAX_CARDS", "100000")))
 
 @app.post("/predict")
-def predict(request: PredictionRequest):
+async def predict(request: PredictionRequest, http_request: Request):
+    # Body read, JSON parsing and pydantic validation all happen before the handler runs
+    STAGE_LATENCY.observe(time.perf_counter() - http_request.state.received_at, "decode_validate")
+    # Pin the current model for the whole request, even if a reload swaps it meanwhile
+    bundle = current_bundle()
     try:
-        # Extract values from the request
-        amount = request.amount
-        time = request.time
-        
-        # Scale amount and time separately using their respective scalers
-        scaled_amount = scaler_amount.transform([[amount]])[0][0]
-        scaled_time = scaler_time.transform([[time]])[0][0]
-        
-        # Create the feature vector in the correct order: [V1-V28, scaled_amount, scaled_time]
-        # Initialize with default values (0) for V1-V28 if not provided
-        feature_dict = {'scaled_amount': scaled_amount, 'scaled_time': scaled_time}
-        
-        # Add V1-V28 features (default to 0 if not provided)
-        for i in range(1, 29):
-            feature_name = f'V{i}'
-            feature_value = getattr(request, feature_name, 0.0)
-            feature_dict[feature_name] = feature_value
-        
-        # Create feature vector in the correct order as used during training
-        feature_vector = [feature_dict[name] for name in feature_names]
-        
-        # Convert to numpy array
-        features_array = np.array(feature_vector).reshape(1, -1)
-        scaled_features = features_array
-        
-        # Make prediction
-        prediction = model.predict(scaled_features)[0]
-        prediction_proba = model.predict_proba(scaled_features)[0]
-        
-        # Get the confidence score (probability of the predicted class)
-        confidence = max(prediction_proba) * 100
-        
-        # Get individual class probabilities
-        fraud_prob = prediction_proba[1] * 100  # Probability of fraud
-        legit_prob = prediction_proba[0] * 100  # Probability of legitimate
-        
+        # Recent history of the card, including this transaction
+        velocity = None
+        if request.card_id is not None:
+            velocity = velocity_store.update(request.card_id, request.time, request.amount)
+
+        # One raw row in feature_names order: [V1-V28, amount, time, velocity features
+        # if the model was trained with them]; scaled with its batch
+        with timed("assemble"):
+            values = dict(zip(VELOCITY_FEATURES, velocity or first_seen_features(request.amount)))
+            columns = {name: [values[name] if name in values else getattr(request, name)]
+                       for name in raw_feature_order(bundle.feature_names)}
+            X = assemble_matrix(columns, bundle.feature_names)
+
         # Enhanced fraud detection logic
         # Flag as fraud if:
-        # 1. Model predicts fraud OR
-        # 2. Fraud probability > 20% OR 
-        # 3. Amount > $50,000 OR
-        # 4. Suspicious time patterns
-        
-        is_fraud = (prediction == 1 or 
-                   fraud_prob > 20 or 
-                   amount > 50000 or 
-                   (amount > 10000 and time < 300) or  # High amount + very fast
-                   (amount > 10000 and time > 72000))  # High amount + very slow
-        
-        result = "Fraud" if is_fraud else "Legitimate"
-        
-        return {
-            "prediction": result,
-            "confidence": round(float(confidence), 2),
-            "fraud_probability": round(float(fraud_prob), 2),
-            "legitimate_probability": round(float(legit_prob), 2)
-        }
+        # 1. Fraud probability > threshold (20% by default) OR
+        # 2. Amount > max amount ($50,000 by default) OR
+        # 3. Suspicious time patterns for high amounts
+        # (see scoring.apply_rules; calibrated values come from rules.json)
+        result = await score_one(bundle, X)
+        if velocity is not None:
+            result["velocity"] = dict(zip(VELOCITY_FEATURES, velocity))
+        return result
         
     except Exception as e:
         print(f"Error in prediction: {e}")
         raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
 
+async def decode_array_request(http_request, n_features):
+    # Positional/binary payloads skip pydantic; they are decoded straight into a matrix
+    body = await http_request.body()
+    try:
+        X = decode_rows(body, http_request.headers.get("content-type", ""), n_features)
+    except UnsupportedMediaType as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    STAGE_LATENCY.observe(time.perf_counter() - http_request.state.received_at, "decode_validate")
+    return X
+
+@app.post("/predict/array")
+async def predict_array(http_request: Request):
+    # Single row in /predict/batch/schema order, as packed floats or a JSON array
+    bundle = current_bundle()
+    X = await decode_array_request(http_request, len(bundle.feature_names))
+    if len(X) != 1:
+        raise HTTPException(status_code=422, detail=f"Expected 1 row, got {len(X)}; use /predict/batch/array")
+    try:
+        return await score_one(bundle, X)
+    except Exception as e:
+        print(f"Error in prediction: {e}")
+        raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
+
+@app.get("/predict/batching")
+def predict_batching_metrics():
+    return {
+        "window_ms": predict_batcher.window * 1000,
+        "max_rows": predict_batcher.max_rows,
+        **predict_batcher.metrics.snapshot()
+    }
+
+@app.get("/velocity/stats")
+def velocity_stats():
+    return velocity_store.stats()
+
+@app.get("/predict/cache")
+def predict_cache_stats():
+    return result_cache.stats()
+
+@app.get("/predict/batch/schema")
+def batch_schema():
+    return {"row_order": raw_feature_order(current_bundle().feature_names)}
+
+def batch_matrix(request, feature_names):
+    # Raw matrix of a columns/rows request body; 422 on malformed input
+    if (request.columns is None) == (request.rows is None):
+        raise HTTPException(status_code=422, detail="Provide exactly one of 'columns' or 'rows'")
+    try:
+        if request.columns is not None:
+            return assemble_matrix(request.columns, feature_names)
+        X = np.array(request.rows, dtype=np.float64)
+        if X.size == 0:
+            X = X.reshape(0, len(feature_names))
+        if X.ndim != 2 or X.shape[1] != len(feature_names):
+            raise ValueError(f"Each row must have {len(feature_names)} values")
+        return X
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+@app.post("/predict/batch")
+def predict_batch(request: BatchPredictionRequest):
+    bundle = current_bundle()
+    X = batch_matrix(request, bundle.feature_names)
+    if len(X) == 0:
+        return {"count": 0, "results": []}
+
+    try:
+        results = score_many(bundle, X)
+        return {"count": len(results), "results": results}
+    except Exception as e:
+        print(f"Error in batch prediction: {e}")
+        raise HTTPException(status_code=500, detail=f"Batch prediction error: {str(e)}")
+
+@app.post("/predict/batch/array")
+async def predict_batch_array(http_request: Request):
+    # Rows in /predict/batch/schema order, as packed floats or a JSON array of rows
+    bundle = current_bundle()
+    X = await decode_array_request(http_request, len(bundle.feature_names))
+    try:
+        results = await run_in_threadpool(score_many, bundle, X)
+        return {"count": len(results), "results": results}
+    except Exception as e:
+        print(f"Error in batch prediction: {e}")
+        raise HTTPException(status_code=500, detail=f"Batch prediction error: {str(e)}")
+
+@app.post("/explain")
+def explain(request: BatchPredictionRequest, top: int = 10):
+    # Per-feature contributions to the fraud score of each row (same body as /predict/batch);
+    # bypasses the result cache and the drift monitor
+    bundle = current_bundle()
+    if not bundle.explainable:
+        raise HTTPException(status_code=501, detail=f"Model type {bundle.info()['model_type']} cannot be explained")
+    if top < 0:
+        raise HTTPException(status_code=422, detail="top must be >= 0 (0 returns every feature)")
+    X = batch_matrix(request, bundle.feature_names)
+    if len(X) == 0:
+        return {"count": 0, "results": []}
+    try:
+        with timed("explain"):
+            explanation = bundle.explain(X, top)
+        return {"count": len(X), **explanation}
+    except Exception as e:
+        print(f"Error in explanation: {e}")
+        raise HTTPException(status_code=500, detail=f"Explanation error: {str(e)}")
+
+# Chunks of /predict/bulk uploads are scored on these threads (tree evaluation releases the GIL)
+BULK_WORKERS = int(os.environ.get("BULK_WORKERS", str(os.cpu_count())))
+bulk_executor = ThreadPoolExecutor(BULK_WORKERS, thread_name_prefix="bulk-score")
+
+@app.post("/predict/bulk")
+async def predict_bulk(http_request: Request, format: str = "ndjson", chunk_rows: int = 10000):
+    # Streams a creditcard.csv-schema upload through the model with bounded memory
+    if format not in OUTPUT_FORMATS:
+        raise HTTPException(status_code=422, detail=f"format must be one of {sorted(OUTPUT_FORMATS)}")
+    if chunk_rows <= 0:
+        raise HTTPException(status_code=422, detail="chunk_rows must be positive")
+
+    bundle = current_bundle()
+    chunker = CsvChunker(chunk_rows)
+    body = http_request.stream()
+    loop = asyncio.get_running_loop()
+
+    # Line splitting and CSV parsing run on the bulk threads too, never on the event loop
+    def feed(data):
+        return loop.run_in_executor(bulk_executor, chunker.feed, data)
+
+    def finish():
+        return loop.run_in_executor(bulk_executor, chunker.finish)
+
+    frames = []
+    # Read up to the header first so a bad upload still gets a proper error status
+    async for data in body:
+        frames += await feed(data)
+        if chunker.header is not None:
+            break
+    else:
+        frames += await finish()
+    if chunker.header is None:
+        raise HTTPException(status_code=422, detail="Empty upload")
+    try:
+        check_header(chunker.header, bundle.feature_names)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    async def scored_chunks():
+        progress = Progress(f"/predict/bulk ({bundle.version})")
+        pending = deque()
+        start_row = 0
+
+        def submit(frame):
+            nonlocal start_row
+            pending.append((len(frame), loop.run_in_executor(bulk_executor, score_frame, bundle, frame, start_row,
+                                                             format)))
+            start_row += len(frame)
+
+        async def oldest():
+            rows, future = pending.popleft()
+            text = await future
+            progress.update(rows)
+            return text
+
+        if format == "csv":
+            yield csv_header()
+        for frame in frames:
+            submit(frame)
+        # At most 2 chunks per worker are parsed or being scored at any time
+        async for data in body:
+            for frame in await feed(data):
+                submit(frame)
+                while len(pending) >= 2 * BULK_WORKERS:
+                    yield await oldest()
+        for frame in await finish():
+            submit(frame)
+        while pending:
+            yield await oldest()
+        progress.done()
+
+    return StreamingResponse(scored_chunks(), media_type=OUTPUT_FORMATS[format])
+
+def drift_monitor():
+    monitor = current_bundle().drift
+    if monitor is None:
+        raise HTTPException(status_code=404, detail="No reference profile for the current model; retrain to create one")
+    return monitor
+
+@app.get("/drift")
+def drift_report(min_rows: int = 100):
+    # PSI/KS of live /predict inputs and scores against the training profile, since the
+    # model was loaded or the last reset
+    return drift_monitor().report(min_rows)
+
+@app.post("/drift/reset")
+def reset_drift():
+    drift_monitor().reset()
+    return {"status": "reset"}
+
+@app.get("/admin/model")
+def model_status():
+    return registry.status()
+
+@app.post("/admin/reload-model", status_code=202)
+def reload_model():
+    # Loads and warms the new artifacts in the background; the swap is atomic
+    registry.reload()
+    return {"status": "reloading", "current_version": registry.status()["version"]}
+
+@app.get("/admin/shadow")
+def shadow_status():
+    # Challenger model, shadow queue and how often its decisions agree with the primary's
+    return {"challenger": challenger_registry.status(), **shadow_scorer.stats()}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    # Prometheus text exposition format
+    bundle = registry.current
+    batching = predict_batcher.metrics
+    extra = [
+        "# HELP fraud_api_model_info Model currently being served",
+        "# TYPE fraud_api_model_info gauge"
+    ]
+    if bundle is not None:
+        extra += [
+            f'fraud_api_model_info{{version="{bundle.version}",type="{bundle.info()["model_type"]}"}} 1',
+            "# HELP fraud_api_model_ready_seconds Seconds from worker boot until the first model was ready",
+            "# TYPE fraud_api_model_ready_seconds gauge",
+            f"fraud_api_model_ready_seconds {model_ready_s}"
+        ]
+        if bundle.drift is not None:
+            feature_psi, score_psi = bundle.drift.max_psi()
+            extra += [
+                "# HELP fraud_api_drift_psi Population stability index of live traffic against the training profile",
+                "# TYPE fraud_api_drift_psi gauge",
+                f'fraud_api_drift_psi{{series="max_feature"}} {feature_psi}',
+                f'fraud_api_drift_psi{{series="score"}} {score_psi}'
+            ]
+    extra += [
+        "# HELP fraud_api_model_reloads_total Successful hot reloads",
+        "# TYPE fraud_api_model_reloads_total counter",
+        f"fraud_api_model_reloads_total {registry.reloads}",
+        "# HELP fraud_api_result_cache_lookups_total Result cache lookups by outcome",
+        "# TYPE fraud_api_result_cache_lookups_total counter",
+        f'fraud_api_result_cache_lookups_total{{result="hit"}} {result_cache.hits}',
+        f'fraud_api_result_cache_lookups_total{{result="miss"}} {result_cache.misses}',
+        "# HELP fraud_api_result_cache_entries Cached scoring results",
+        "# TYPE fraud_api_result_cache_entries gauge",
+        f"fraud_api_result_cache_entries {result_cache.stats()['entries']}",
+        "# HELP fraud_api_predict_batch_size Rows per /predict micro-batch",
+        "# TYPE fraud_api_predict_batch_size histogram"
+    ]
+    extra += render_histogram("fraud_api_predict_batch_size", BATCH_SIZE_BUCKETS,
+                              batching.batch_size_counts, batching.rows)
+    extra += [
+        "# HELP fraud_api_predict_queue_delay_ms Time /predict rows wait for their micro-batch",
+        "# TYPE fraud_api_predict_queue_delay_ms histogram"
+    ]
+    extra += render_histogram("fraud_api_predict_queue_delay_ms", QUEUE_DELAY_BUCKETS_MS,
+                              batching.queue_delay_counts, batching.queue_delay_sum_ms)
+    return render_all(extra)
+
+# Sampling profiler that can be switched on in production when /predict gets slow
+profiler = SamplingProfiler()
+
+@app.post("/admin/profiler/start")
+def start_profiler(interval_ms: float = 5.0):
+    if not profiler.start(interval_ms / 1000):
+        raise HTTPException(status_code=409, detail="Profiler already running")
+    return {"status": "running", "interval_ms": interval_ms}
+
+@app.post("/admin/profiler/stop")
+def stop_profiler(top: int = 50):
+    report = profiler.stop(top)
+    if report is None:
+        raise HTTPException(status_code=409, detail="Profiler is not running")
+    return report
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="127.0.0.1", port=8000)
\ No newline at end of file
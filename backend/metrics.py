@@ -0,0 +1,111 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds; covers ~100us single-row scoring up to multi-second bulk requests
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+
+def _label_text(label_names, labels):
+    if not label_names:
+        return ""
+    pairs = ",".join(f'{name}="{value}"' for name, value in zip(label_names, labels))
+    return "{" + pairs + "}"
+
+
+def render_histogram(name, bounds, counts, total, label_text=""):
+    """Prometheus text lines for one histogram series from per-bucket (non-cumulative) counts."""
+    lines = []
+    inner = label_text[1:-1] + "," if label_text else ""
+    cumulative = 0
+    for bound, count in zip(bounds, counts):
+        cumulative += count
+        lines.append(f'{name}_bucket{{{inner}le="{bound}"}} {cumulative}')
+    cumulative += counts[len(bounds)]
+    lines.append(f'{name}_bucket{{{inner}le="+Inf"}} {cumulative}')
+    lines.append(f"{name}_sum{label_text} {total}")
+    lines.append(f"{name}_count{label_text} {cumulative}")
+    return lines
+
+
+class Histogram:
+    """Fixed-bucket histogram per label set; observe() is a bisect plus two adds."""
+
+    def __init__(self, name, description, label_names=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.label_names = label_names
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {labels: (list(counts), total) for labels, (counts, total) in self._series.items()}
+        for labels, (counts, total) in sorted(series.items()):
+            lines += render_histogram(self.name, self.buckets, counts, total, _label_text(self.label_names, labels))
+        return lines
+
+
+class Counter:
+    def __init__(self, name, description, label_names=()):
+        self.name = name
+        self.description = description
+        self.label_names = label_names
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, amount=1, *labels):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            lines.append(f"{self.name}{_label_text(self.label_names, labels)} {value}")
+        return lines
+
+
+REQUEST_LATENCY = Histogram("fraud_api_request_duration_seconds", "End-to-end request latency", ("endpoint",))
+STAGE_LATENCY = Histogram("fraud_api_stage_duration_seconds", "Latency of individual request stages", ("stage",))
+REQUESTS = Counter("fraud_api_requests_total", "Requests by endpoint and status code", ("endpoint", "status"))
+ERRORS = Counter("fraud_api_errors_total", "Requests that failed with a 5xx status", ("endpoint",))
+SCORED_ROWS = Counter("fraud_api_scored_rows_total", "Transactions scored by the model")
+FLAGGED = Counter("fraud_api_flagged_total",
+                  "Transactions flagged as fraud, by what flagged them (model output or rule override only)",
+                  ("source",))
+SHADOW_ROWS = Counter("fraud_api_shadow_rows_total",
+                      "Rows sent to the challenger model, by outcome (scored, shed when its queue was full, error)",
+                      ("outcome",))
+
+ALL_METRICS = [REQUEST_LATENCY, STAGE_LATENCY, REQUESTS, ERRORS, SCORED_ROWS, FLAGGED, SHADOW_ROWS]
+
+
+@contextmanager
+def timed(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.observe(time.perf_counter() - start, stage)
+
+
+def render_all(extra_lines=()):
+    lines = []
+    for metric in ALL_METRICS:
+        lines += metric.render()
+    lines += extra_lines
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,77 @@
+import collections
+import os
+import sys
+import threading
+import time
+
+
+class SamplingProfiler:
+    """Wall-clock sampling profiler that can be switched on at runtime.
+
+    A background thread snapshots every other thread's Python stack each
+    ``interval`` seconds and counts identical stacks. Results are returned in
+    the folded format understood by flamegraph tools. Nothing runs while it is
+    stopped, so it costs nothing when disabled.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._stacks = collections.Counter()
+        self.samples = 0
+        self.interval = None
+        self.started_at = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self, interval=0.005):
+        with self._lock:
+            if self._thread is not None:
+                return False
+            self._stacks = collections.Counter()
+            self.samples = 0
+            self.interval = interval
+            self.started_at = time.time()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self, top=50):
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return None
+        self._stop.set()
+        thread.join()
+        return self.report(top)
+
+    def report(self, top=50):
+        return {
+            "samples": self.samples,
+            "interval_ms": self.interval * 1000 if self.interval else None,
+            "duration_s": round(time.time() - self.started_at, 3) if self.started_at else None,
+            "stacks": dict(self._stacks.most_common(top))
+        }
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                self._stacks[_fold(frame)] += 1
+            self.samples += 1
+
+
+def _fold(frame):
+    # root;caller;...;leaf with "file:function" entries
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
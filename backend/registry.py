@@ -0,0 +1,272 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from compiled_model import (COMPACT_MODEL_FILE, COMPILED_MODEL_FILE, MODEL_FILE, CompiledModel, compiled_arrays,
+                            compiled_model_path)
+from drift import PROFILE_FILE, load_monitor
+from explain import build_explainer, explain_matrix
+from scoring import (DEFAULT_RULES, RULES_FILE, decide_matrix, load_rules, rules_json, scaler_params, scaling_params,
+                     score_matrix)
+
+# Artifacts whose changes trigger a reload, in load-preference order
+WATCHED_FILES = [COMPACT_MODEL_FILE, COMPILED_MODEL_FILE, MODEL_FILE,
+                 "scaler_amount.pkl", "scaler_time.pkl", "feature_names.pkl", RULES_FILE, PROFILE_FILE]
+
+
+class ModelBundle:
+    """A loaded model with everything needed to score against it.
+
+    Bundles are never mutated (apart from building the explainer on first
+    use). Requests hold a reference to the bundle they started with, so a
+    swapped-out model stays alive until they finish.
+    """
+
+    def __init__(self, model, feature_names, amount_params, time_params, version, source, rules=DEFAULT_RULES,
+                 drift=None):
+        self.model = model
+        self.feature_names = feature_names
+        self.scaling = scaling_params(feature_names, amount_params, time_params)
+        self.version = version
+        self.source = source
+        self.rules = rules
+        # DriftMonitor for this model's reference profile (None without one); a swap starts a fresh one
+        self.drift = drift
+        # Per-node contribution tables for /explain. Compiled models (all explainable) build them
+        # on the first /explain call: under serve.py they would otherwise be a private copy in
+        # every worker, about as large as the shared model arrays
+        self._explainer_lock = threading.Lock()
+        self._explainer = None if hasattr(model, 'arrays') else build_explainer(model, len(feature_names))
+        self.explainable = hasattr(model, 'arrays') or self._explainer is not None
+        self.loaded_at = time.time()
+
+    def score(self, X, record_metrics=True, return_probabilities=False):
+        return score_matrix(self.model, X, self.feature_names, self.scaling, record_metrics, self.rules,
+                            return_probabilities)
+
+    def decide(self, X):
+        return decide_matrix(self.model, X, self.scaling, self.rules)
+
+    @property
+    def explainer(self):
+        # None if the model type cannot be explained
+        if self._explainer is None and self.explainable:
+            with self._explainer_lock:
+                if self._explainer is None:
+                    self._explainer = build_explainer(self.model, len(self.feature_names))
+        return self._explainer
+
+    def explain(self, X, top=10):
+        return explain_matrix(self.explainer, X, self.feature_names, self.scaling, self.rules, top)
+
+    def warm_up(self, n_rows=8):
+        # Dummy predictions so lazy initialization and caches are done before serving
+        X = np.zeros((n_rows, len(self.feature_names)))
+        X[:, self.scaling[0]] = self.scaling[1]
+        for size in (1, n_rows):
+            self.score(X[:size].copy(), record_metrics=False)
+            if self._explainer is not None:
+                self.explain(X[:size].copy())
+
+    def info(self):
+        return {
+            "version": self.version,
+            "source": self.source,
+            "model_type": getattr(self.model, 'kind', type(self.model).__name__),
+            "explainable": self.explainable,
+            "rules": rules_json(self.rules),
+            "loaded_at": self.loaded_at
+        }
+
+
+def _file_digest(*paths):
+    # Cached results are keyed by version, so it covers every file that changes a score
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def _rules(model_dir):
+    # Calibrated rule parameters (rules.json) if present, as (rules, [path]) for the version digest
+    path = os.path.join(model_dir, RULES_FILE)
+    if not os.path.exists(path):
+        return DEFAULT_RULES, []
+    return load_rules(path), [path]
+
+
+def load_bundle(model_dir):
+    """Load the compact or compiled export if present, otherwise the pickled model and scalers."""
+    rules, rules_paths = _rules(model_dir)
+    compiled_path = compiled_model_path(model_dir)
+    if compiled_path is not None:
+        # Flat NumPy arrays exported by improved_fraud_model.py; no sklearn unpickling
+        model = CompiledModel.load(compiled_path)
+        return ModelBundle(model, model.feature_names, model.scaler_params['amount'], model.scaler_params['time'],
+                           _file_digest(compiled_path, *rules_paths), compiled_path, rules,
+                           load_monitor(model_dir, model.feature_names))
+
+    import joblib
+
+    # model_training/ is on sys.path (see scoring.py), so pickles of training-side classes
+    # such as imbalance.EasyEnsemble load here and in the bulk_score CLI too
+    model_path = os.path.join(model_dir, MODEL_FILE)
+    model = joblib.load(model_path)
+    feature_names = joblib.load(os.path.join(model_dir, "feature_names.pkl"))
+    amount_params = scaler_params(joblib.load(os.path.join(model_dir, "scaler_amount.pkl")))
+    time_params = scaler_params(joblib.load(os.path.join(model_dir, "scaler_time.pkl")))
+    return ModelBundle(model, feature_names, amount_params, time_params,
+                       _file_digest(model_path, *rules_paths), model_path, rules,
+                       load_monitor(model_dir, feature_names))
+
+
+def attach_bundle(shared_dir, model_dir):
+    # Model published by serve.py as memory-mappable arrays shared by all workers
+    model = CompiledModel.attach(shared_dir)
+    rules, rules_paths = _rules(model_dir)
+    version = f"shared:{os.path.basename(shared_dir)}"
+    if rules_paths:
+        version += f"+{_file_digest(*rules_paths)}"
+    return ModelBundle(model, model.feature_names, model.scaler_params['amount'], model.scaler_params['time'],
+                       version, shared_dir, rules, load_monitor(model_dir, model.feature_names))
+
+
+def publish_bundle(shared_dir, model_dir):
+    """Publish the artifacts in model_dir once for all serve.py workers and attach to them.
+
+    Every worker reloads when the artifacts change. The arrays go under the
+    launcher's shared directory, named by the artifacts' digest: the first
+    worker to finish renames its copy into place and the others attach to it,
+    so the workers keep sharing a single copy after a hot reload.
+    """
+    compiled_path = compiled_model_path(model_dir)
+    sources = [compiled_path] if compiled_path else [
+        os.path.join(model_dir, name) for name in (MODEL_FILE, "scaler_amount.pkl", "scaler_time.pkl",
+                                                   "feature_names.pkl")]
+    target = os.path.join(shared_dir, "reloads", _file_digest(*sources))
+    if not os.path.isdir(target):
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        staging = tempfile.mkdtemp(dir=os.path.dirname(target))
+        try:
+            model = CompiledModel(compiled_arrays(model_dir))
+            model.verify()
+            model.publish(staging)
+            os.rename(staging, target)
+        except OSError:
+            # Another worker published the same artifacts first
+            if not os.path.isdir(target):
+                raise
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+    return attach_bundle(target, model_dir)
+
+
+class ModelRegistry:
+    """Holds the live ModelBundle and replaces it without interrupting requests.
+
+    New artifacts are loaded and warmed on a background thread, then swapped in
+    with a single reference assignment. Reloads are triggered by reload() (the
+    admin endpoint) or by a watcher polling model_dir for changed artifacts.
+    """
+
+    def __init__(self, model_dir, shared_dir=None):
+        self.model_dir = model_dir
+        self.shared_dir = shared_dir
+        self._current = None
+        self._reload_lock = threading.Lock()
+        self._watcher = None
+        self._stop = threading.Event()
+        self._signature = None
+        self.last_error = None
+        self.reloads = 0
+        # Called as fn(previous, new) after every successful swap (e.g. cache invalidation)
+        self.swap_listeners = []
+
+    @property
+    def current(self):
+        return self._current
+
+    def _artifact_signature(self):
+        signature = []
+        for name in WATCHED_FILES:
+            path = os.path.join(self.model_dir, name)
+            if os.path.exists(path):
+                stat = os.stat(path)
+                signature.append((name, stat.st_size, stat.st_mtime))
+        return tuple(signature)
+
+    def load(self):
+        """Synchronously load the initial model (startup)."""
+        signature = self._artifact_signature()
+        bundle = attach_bundle(self.shared_dir, self.model_dir) if self.shared_dir else load_bundle(self.model_dir)
+        bundle.warm_up()
+        self._signature = signature
+        self._current = bundle
+        return bundle
+
+    def _reload(self):
+        # One reload at a time; a failed load keeps serving the previous model
+        with self._reload_lock:
+            # Recorded up front so the watcher tries each new set of artifacts only once
+            self._signature = self._artifact_signature()
+            try:
+                if self.shared_dir:
+                    bundle = publish_bundle(self.shared_dir, self.model_dir)
+                else:
+                    bundle = load_bundle(self.model_dir)
+                bundle.warm_up()
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                kept = self._current.version if self._current else None
+                print(f"Model reload failed, keeping version {kept}: {e}")
+                return None
+            self.last_error = None
+            self.reloads += 1
+            previous, self._current = self._current, bundle
+            print(f"Model swapped: {previous.version if previous else None} -> {bundle.version}")
+            for listener in self.swap_listeners:
+                listener(previous, bundle)
+            return bundle
+
+    def reload(self, background=True):
+        """Load the artifacts in model_dir and swap them in once warmed up."""
+        if not background:
+            return self._reload()
+        thread = threading.Thread(target=self._reload, name="model-reload", daemon=True)
+        thread.start()
+        return thread
+
+    def _watch(self, interval):
+        while not self._stop.wait(interval):
+            signature = self._artifact_signature()
+            if signature and signature != self._signature:
+                # Give a writer that is still producing the files a moment to finish
+                time.sleep(min(interval, 1.0))
+                if self._artifact_signature() == signature:
+                    self._reload()
+
+    def start_watching(self, interval):
+        if interval <= 0 or self._watcher is not None:
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, args=(interval,), name="model-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        self._stop.set()
+        self._watcher = None
+
+    def status(self):
+        return {
+            **(self._current.info() if self._current else {"version": None}),
+            "reloads": self.reloads,
+            "watching": self._watcher is not None,
+            "last_error": self.last_error
+        }
@@ -0,0 +1,199 @@
+import json
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+from metrics import FLAGGED, SCORED_ROWS, STAGE_LATENCY
+
+# Velocity feature definitions (and classes in pickled models, e.g. imbalance.EasyEnsemble)
+# come from the training scripts in model_training/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "model_training"))
+from velocity import VELOCITY_FEATURES, first_seen_matrix  # noqa: E402
+
+# Raw request fields that the training scripts replaced with their scaled versions
+SCALED_TO_RAW = {'scaled_amount': 'amount', 'scaled_time': 'time'}
+
+# Rule overrides applied on top of the model output (see apply_rules). These are the
+# defaults; model_training/calibrate_rules.py writes tuned values to rules.json, which
+# is loaded with the model
+FRAUD_PROBABILITY_THRESHOLD = 20
+# Thresholds above 50 would stop flagging rows the model itself predicts as fraud
+MAX_FRAUD_PROBABILITY_THRESHOLD = 50
+MAX_AMOUNT = 50000
+HIGH_AMOUNT = 10000
+FAST_TIME = 300
+SLOW_TIME = 72000
+
+RULES_FILE = "rules.json"
+DEFAULT_RULES = {
+    "fraud_probability_threshold": FRAUD_PROBABILITY_THRESHOLD,
+    "max_amount": MAX_AMOUNT,
+    "high_amount": HIGH_AMOUNT,
+    "fast_time": FAST_TIME,
+    "slow_time": SLOW_TIME
+}
+
+
+def raw_feature_order(feature_names):
+    # Column order of raw payloads: feature_names with amount/time unscaled
+    return [SCALED_TO_RAW.get(name, name) for name in feature_names]
+
+
+def scaler_params(scaler):
+    # (mean, scale) of a fitted single-column StandardScaler
+    return float(scaler.mean_[0]), float(scaler.scale_[0])
+
+
+def scaling_params(feature_names, amount_params, time_params):
+    # Column indices plus mean/scale vectors so both scalers apply in one operation
+    index = np.array([feature_names.index('scaled_amount'), feature_names.index('scaled_time')])
+    mean = np.array([amount_params[0], time_params[0]])
+    scale = np.array([amount_params[1], time_params[1]])
+    return index, mean, scale
+
+
+def assemble_matrix(columns, feature_names):
+    """Build a float64 matrix in feature_names order from a dict of raw columns.
+
+    ``columns`` maps raw names (amount, time, V1-V28) to equal-length sequences.
+    Missing V features default to 0 and missing velocity features to a card's
+    first transaction (first_seen_features), like the single-row endpoint.
+    """
+    if 'amount' not in columns or 'time' not in columns:
+        raise ValueError("Columns 'amount' and 'time' are required")
+
+    n_rows = len(columns['amount'])
+    X = np.zeros((n_rows, len(feature_names)), dtype=np.float64)
+    first_seen = None
+    for j, name in enumerate(raw_feature_order(feature_names)):
+        values = columns.get(name)
+        if values is None:
+            if name in VELOCITY_FEATURES:
+                if first_seen is None:
+                    first_seen = first_seen_matrix(columns['amount'])
+                X[:, j] = first_seen[:, VELOCITY_FEATURES.index(name)]
+            continue
+        if len(values) != n_rows:
+            raise ValueError(f"Column '{name}' has {len(values)} values, expected {n_rows}")
+        X[:, j] = values
+    return X
+
+
+def scale_matrix(X, params):
+    # Replace raw amount/time columns with their scaled values, in place
+    index, mean, scale = params
+    X[:, index] -= mean
+    X[:, index] /= scale
+    return X
+
+
+def load_rules(path):
+    """Rule parameters from a rules.json artifact, defaults for anything it leaves out.
+
+    A null amount or time disables that rule (it becomes an infinite bound).
+    Raises ValueError for a threshold above MAX_FRAUD_PROBABILITY_THRESHOLD.
+    """
+    with open(path) as f:
+        values = json.load(f)["rules"]
+    rules = dict(DEFAULT_RULES)
+    for name in DEFAULT_RULES:
+        if name in values:
+            value = values[name]
+            if value is None:
+                # Disabled: no amount exceeds +inf; fast_time -inf / slow_time +inf never match
+                value = -math.inf if name == "fast_time" else math.inf
+            rules[name] = float(value)
+    if rules["fraud_probability_threshold"] > MAX_FRAUD_PROBABILITY_THRESHOLD:
+        raise ValueError(f"fraud_probability_threshold {rules['fraud_probability_threshold']} in {path} is above "
+                         f"{MAX_FRAUD_PROBABILITY_THRESHOLD}; the model's own fraud predictions would go unflagged")
+    return rules
+
+
+def rules_json(rules):
+    # Inverse of load_rules: disabled (infinite) bounds as null, which JSON can represent
+    return {name: (None if math.isinf(value) else value) for name, value in rules.items()}
+
+
+def apply_rules(fraud_prob, amount, time, rules=DEFAULT_RULES):
+    """Fraud decision: probability (in %) above the threshold, or an amount/time rule.
+
+    With a threshold of at most 50 (load_rules enforces it) this also flags
+    everything the model's own predict() would.
+    """
+    high_amount = amount > rules["high_amount"]
+    return ((fraud_prob > rules["fraud_probability_threshold"]) |
+            (amount > rules["max_amount"]) |
+            (high_amount & (time < rules["fast_time"])) |
+            (high_amount & (time > rules["slow_time"])))
+
+
+def decide_matrix(model, X_raw, params, rules=DEFAULT_RULES):
+    """Fraud probability (%) and decision per raw row, without building responses or metrics."""
+    if not X_raw.flags.writeable:
+        X_raw = X_raw.copy()
+    amount_idx, time_idx = params[0]
+    amount = X_raw[:, amount_idx].copy()
+    time_ = X_raw[:, time_idx].copy()
+    fraud_prob = model.predict_proba(scale_matrix(X_raw, params))[:, 1] * 100
+    return fraud_prob, apply_rules(fraud_prob, amount, time_, rules)
+
+
+def score_matrix(model, X_raw, feature_names, params, record_metrics=True, rules=DEFAULT_RULES,
+                 return_probabilities=False):
+    """Score raw rows (feature_names order, unscaled amount/time) in one model call.
+
+    Returns a list of per-row result dicts in input order, plus the unrounded
+    fraud probabilities (%) with ``return_probabilities``. Unless disabled, each
+    stage's latency is recorded in the stage histogram, plus model- vs
+    rule-flagged counts.
+    """
+    t0 = time.perf_counter()
+    if not X_raw.flags.writeable:
+        # Zero-copy views over request bodies are read-only; scaling needs its own buffer
+        X_raw = X_raw.copy()
+    amount_idx, time_idx = params[0]
+    amount = X_raw[:, amount_idx].copy()
+    time_ = X_raw[:, time_idx].copy()
+    X = scale_matrix(X_raw, params)
+
+    t1 = time.perf_counter()
+    proba = model.predict_proba(X)
+
+    t2 = time.perf_counter()
+    fraud_prob = proba[:, 1] * 100
+    legit_prob = proba[:, 0] * 100
+    confidence = proba.max(axis=1) * 100
+    is_fraud = apply_rules(fraud_prob, amount, time_, rules)
+    model_flagged = int((fraud_prob > rules["fraud_probability_threshold"]).sum())
+
+    t3 = time.perf_counter()
+    labels = np.where(is_fraud, "Fraud", "Legitimate").tolist()
+    results = [
+        {
+            "prediction": label,
+            "confidence": conf,
+            "fraud_probability": fraud,
+            "legitimate_probability": legit
+        }
+        for label, conf, fraud, legit in zip(
+            labels,
+            np.round(confidence, 2).tolist(),
+            np.round(fraud_prob, 2).tolist(),
+            np.round(legit_prob, 2).tolist()
+        )
+    ]
+
+    if not record_metrics:
+        return (results, fraud_prob) if return_probabilities else results
+    t4 = time.perf_counter()
+    STAGE_LATENCY.observe(t1 - t0, "scale")
+    STAGE_LATENCY.observe(t2 - t1, "model")
+    STAGE_LATENCY.observe(t3 - t2, "rules")
+    STAGE_LATENCY.observe(t4 - t3, "format")
+    SCORED_ROWS.inc(len(results))
+    FLAGGED.inc(model_flagged, "model")
+    FLAGGED.inc(int(is_fraud.sum()) - model_flagged, "rule")
+    return (results, fraud_prob) if return_probabilities else results
@@ -0,0 +1,55 @@
+import argparse
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+
+import uvicorn
+
+from compiled_model import CompiledModel, compiled_arrays
+from config import BACKEND_DIR, MODEL_DIR
+from scoring import VELOCITY_FEATURES
+
+
+def publish_model(model_dir, shared_root=None):
+    """Write the model once to a shared-memory directory; returns (path, feature names)."""
+    # /dev/shm is RAM-backed on Linux; elsewhere the page cache still shares the mapped files
+    if shared_root is None:
+        shared_root = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    shared_dir = tempfile.mkdtemp(prefix="fraud-model-", dir=shared_root)
+    model = CompiledModel(compiled_arrays(model_dir))
+    model.verify()
+    model.publish(shared_dir)
+    return shared_dir, model.feature_names
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run the API in several worker processes sharing one model copy. Per-card velocity "
+                    "history is kept per worker, so models trained with velocity features need --workers 1")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes (default: all cores)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--model-dir", default=MODEL_DIR, help="directory with the trained artifacts")
+    parser.add_argument("--shared-root", default=None, help="where to publish the arrays (default: /dev/shm)")
+    args = parser.parse_args()
+
+    try:
+        shared_dir, feature_names = publish_model(args.model_dir, args.shared_root)
+    except TypeError as e:
+        # Only flat models can be shared, e.g. not an easy_ensemble of logistic regressions
+        sys.exit(f"Cannot share the model in {args.model_dir}: {e}. "
+                 "Serve it with 'uvicorn main:app --workers N' instead (one model copy per worker).")
+    atexit.register(shutil.rmtree, shared_dir, True)
+    if args.workers > 1 and any(name in VELOCITY_FEATURES for name in feature_names):
+        # Each worker would only see the transactions routed to it, undercounting every card's history
+        sys.exit("The model uses per-card velocity features, whose history each worker keeps for itself; "
+                 "serve it with --workers 1.")
+    print(f"Model published to {shared_dir} for {args.workers} workers")
+
+    # Workers inherit the environment and memory-map the published arrays read-only;
+    # hot reloads publish the new artifacts once under shared_dir (removed at exit) and attach to them
+    os.environ["FRAUD_MODEL_SHARED_DIR"] = shared_dir
+    os.environ["FRAUD_MODEL_DIR"] = os.path.abspath(args.model_dir)
+    uvicorn.run("main:app", host=args.host, port=args.port, workers=args.workers, app_dir=BACKEND_DIR)
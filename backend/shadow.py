@@ -0,0 +1,175 @@
+import hashlib
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from metrics import SHADOW_ROWS
+from scoring import raw_feature_order
+
+# One fixed-size record per shadow-scored row, appended to the log as raw bytes
+LOG_DTYPE = np.dtype([
+    ('time', '<f8'),         # unix time the primary scored the row
+    ('row_key', '<u8'),      # hash of the raw row (see row_keys), to join with labels offline
+    ('primary', '<f4'),      # fraud probability (%) of the primary, before rounding for the response
+    ('challenger', '<f4'),   # challenger fraud probability (%)
+    ('flags', 'u1')          # PRIMARY_FLAGGED | CHALLENGER_FLAGGED decisions, rules included
+])
+PRIMARY_FLAGGED = 1
+CHALLENGER_FLAGGED = 2
+
+
+def row_keys(X_raw, decimals=6):
+    # 64-bit hash of each raw row, rounded like the result cache keys so replays match
+    quantized = np.ascontiguousarray(np.round(X_raw, decimals) + 0.0, dtype=np.float64)
+    return np.array([int.from_bytes(hashlib.blake2b(row.tobytes(), digest_size=8).digest(), 'little')
+                     for row in quantized], dtype=np.uint64)
+
+
+def log_path(log_dir, primary_version, challenger_version):
+    # One file per model pair, so every record in a file compares the same two models,
+    # and per process, so serve.py workers never interleave their writes
+    return os.path.join(log_dir, f"shadow-{primary_version}-{challenger_version}-{os.getpid()}.bin")
+
+
+def read_log(path):
+    """Records of a shadow log as a structured array (LOG_DTYPE)."""
+    return np.fromfile(path, dtype=LOG_DTYPE)
+
+
+class ShadowScorer:
+    """Scores live rows with a challenger model off the request path.
+
+    ``submit()`` only appends the rows to a queue bounded by ``max_queued_rows``;
+    when the queue is full the rows are shed (counted, not scored), so a slow
+    challenger can never hold up the primary. One worker thread drains
+    everything queued, scores it with one call per model pair and appends a
+    LOG_DTYPE record per row to the log of that pair.
+    """
+
+    def __init__(self, log_dir, max_queued_rows=10000):
+        self.log_dir = log_dir
+        self.max_queued_rows = max_queued_rows
+        self._cond = threading.Condition()
+        self._items = deque()
+        self._stopping = False
+        self._thread = None
+        self._files = {}
+        self.queued_rows = 0
+        self.scored = 0
+        self.shed = 0
+        self.errors = 0
+        self.last_error = None
+        # Decision agreement: [primary flagged][challenger flagged] row counts
+        self.agreement = np.zeros((2, 2), dtype=np.int64)
+        self.abs_diff_sum = 0.0
+
+    def start(self):
+        if self._thread is not None:
+            return
+        os.makedirs(self.log_dir, exist_ok=True)
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="shadow-scorer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        # Scores what is already queued, then closes the logs
+        if self._thread is None:
+            return
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        self._thread.join(timeout)
+        self._thread = None
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
+
+    def submit(self, primary, challenger, X_raw, results, fraud_prob):
+        """Queue raw rows (primary's raw feature order) the primary scored as ``results``.
+
+        ``fraud_prob`` are the primary's unrounded probabilities (%), so the
+        comparison is not skewed by the 2-decimal rounding of the responses.
+        ``X_raw`` must not be modified afterwards. Returns False if the rows were shed.
+        """
+        n_rows = len(X_raw)
+        item = (time.time(), primary.version, primary.feature_names, challenger, X_raw, fraud_prob,
+                [result["prediction"] == "Fraud" for result in results])
+        with self._cond:
+            if self._thread is None or self.queued_rows + n_rows > self.max_queued_rows:
+                self.shed += n_rows
+                SHADOW_ROWS.inc(n_rows, "shed")
+                return False
+            self._items.append(item)
+            self.queued_rows += n_rows
+            self._cond.notify()
+        return True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._items and not self._stopping:
+                    self._cond.wait()
+                if not self._items:
+                    return
+                items = list(self._items)
+                self._items.clear()
+                self.queued_rows = 0
+            groups = {}
+            for item in items:
+                groups.setdefault((item[1], id(item[3])), []).append(item)
+            for group in groups.values():
+                try:
+                    self._score(group)
+                except Exception as e:
+                    n_rows = sum(len(item[4]) for item in group)
+                    self.errors += n_rows
+                    self.last_error = f"{type(e).__name__}: {e}"
+                    SHADOW_ROWS.inc(n_rows, "error")
+
+    def _score(self, group):
+        # Every item in the group has the same primary version and challenger bundle
+        _, primary_version, primary_names, challenger, _, _, _ = group[0]
+        X = np.vstack([item[4] for item in group])
+        raw_names = raw_feature_order(primary_names)
+        columns = [raw_names.index(name) for name in raw_feature_order(challenger.feature_names)]
+        keys = row_keys(X)
+        challenger_prob, challenger_flag = challenger.decide(X[:, columns])
+
+        records = np.empty(len(X), dtype=LOG_DTYPE)
+        records['time'] = np.concatenate([np.full(len(item[4]), item[0]) for item in group])
+        records['row_key'] = keys
+        records['primary'] = np.concatenate([item[5] for item in group])
+        records['challenger'] = challenger_prob
+        primary_flag = np.concatenate([item[6] for item in group]).astype(bool)
+        records['flags'] = primary_flag * PRIMARY_FLAGGED + challenger_flag * CHALLENGER_FLAGGED
+
+        path = log_path(self.log_dir, primary_version, challenger.version)
+        f = self._files.get(path)
+        if f is None:
+            f = self._files[path] = open(path, "ab")
+        f.write(records.tobytes())
+        f.flush()
+
+        np.add.at(self.agreement, (primary_flag.astype(int), challenger_flag.astype(int)), 1)
+        self.abs_diff_sum += float(np.abs(records['primary'] - records['challenger']).sum())
+        self.scored += len(X)
+        SHADOW_ROWS.inc(len(X), "scored")
+
+    def stats(self):
+        (neither, challenger_only), (primary_only, both) = self.agreement.tolist()
+        return {
+            "running": self._thread is not None,
+            "queued_rows": self.queued_rows,
+            "max_queued_rows": self.max_queued_rows,
+            "scored_rows": self.scored,
+            "shed_rows": self.shed,
+            "error_rows": self.errors,
+            "last_error": self.last_error,
+            "flagged": {"both": both, "primary_only": primary_only, "challenger_only": challenger_only,
+                        "neither": neither},
+            "mean_abs_probability_diff": round(self.abs_diff_sum / self.scored, 4) if self.scored else None,
+            "log_dir": self.log_dir
+        }
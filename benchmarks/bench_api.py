@@ -0,0 +1,188 @@
+import argparse
+import asyncio
+import importlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+
+import httpx
+
+from common import latency_summary, run_metadata, write_results
+from synthetic import REPO_DIR, V_COLUMNS, make_workspace, write_model_artifacts
+
+BACKEND_DIR = os.path.join(REPO_DIR, "backend")
+warnings.filterwarnings('ignore')
+
+
+def load_app(workspace, result_cache=False):
+    # Artifact paths come from the environment; point them at the workspace
+    if not result_cache:
+        # Otherwise repeated rows are answered from the result cache instead of the scoring path
+        os.environ["RESULT_CACHE_SIZE"] = "0"
+    os.environ["FRAUD_MODEL_DIR"] = os.path.join(workspace, "model_training")
+    os.environ["FRAUD_DATA_PATH"] = os.path.join(workspace, "data", "creditcard.csv")
+    os.environ["FRAUD_SHADOW_LOG_DIR"] = os.path.join(workspace, "logs")
+    sys.path.insert(0, BACKEND_DIR)
+    main = importlib.import_module("main")
+    return main.app
+
+
+def request_payloads(df, n, seed):
+    rows = df.sample(n=n, replace=True, random_state=seed)
+    payloads = []
+    for row in rows.itertuples(index=False):
+        payload = {"amount": row.Amount, "time": row.Time}
+        payload.update({name: getattr(row, name) for name in V_COLUMNS})
+        payloads.append(payload)
+    return payloads
+
+
+async def bench_predict(client, payloads, concurrency):
+    """Closed-loop load: ``concurrency`` clients send requests back to back."""
+    latencies = []
+    next_index = iter(range(len(payloads)))
+
+    async def worker():
+        for i in next_index:
+            start = time.perf_counter()
+            response = await client.post("/predict", json=payloads[i])
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+    return {"concurrency": concurrency, "rps": round(len(payloads) / elapsed, 2), **latency_summary(latencies)}
+
+
+def batch_payload(df, batch_size, seed):
+    rows = df.sample(n=batch_size, replace=True, random_state=seed)
+    payload = {"columns": {"amount": rows["Amount"].tolist(), "time": rows["Time"].tolist()}}
+    payload["columns"].update({name: rows[name].tolist() for name in V_COLUMNS})
+    return payload
+
+
+async def bench_batch(client, df, batch_size, repeats, seed):
+    # Fresh rows for every request, so an enabled result cache never answers a whole batch
+    payloads = [batch_payload(df, batch_size, seed + r) for r in range(repeats)]
+    latencies = []
+    for payload in payloads:
+        start = time.perf_counter()
+        response = await client.post("/predict/batch", json=payload)
+        latencies.append(time.perf_counter() - start)
+        response.raise_for_status()
+    return {
+        "batch_size": batch_size,
+        "rows_per_sec": round(batch_size * repeats / sum(latencies), 2),
+        **latency_summary(latencies)
+    }
+
+
+async def bench_insights(client, repeats):
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        response = await client.get("/data-insights")
+        latencies.append(time.perf_counter() - start)
+        response.raise_for_status()
+    return latency_summary(latencies)
+
+
+async def wait_until_ready(client, timeout=120.0):
+    start = time.perf_counter()
+    while (await client.get("/health/ready")).status_code != 200:
+        if time.perf_counter() - start > timeout:
+            raise TimeoutError(f"Model not ready within {timeout}s")
+        await asyncio.sleep(0.01)
+    return time.perf_counter() - start
+
+
+async def run(app, df, args):
+    # ASGITransport does not send lifespan events; run the hook that loads the artifacts here
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app), \
+            httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        ready_s = await wait_until_ready(client)
+
+        # Warm-up so import-time and first-call costs are not measured; every level below
+        # draws its own rows
+        for payload in request_payloads(df, 20, seed=0):
+            (await client.post("/predict", json=payload)).raise_for_status()
+        (await client.get("/data-insights")).raise_for_status()
+
+        predict = []
+        for level, concurrency in enumerate(args.concurrency, 1):
+            before = (await client.get("/predict/cache")).json()
+            result = await bench_predict(client, request_payloads(df, args.requests, seed=level), concurrency)
+            after = (await client.get("/predict/cache")).json()
+            lookups = after["hits"] + after["misses"] - before["hits"] - before["misses"]
+            result["cache_hit_rate"] = round((after["hits"] - before["hits"]) / lookups, 4) if lookups else None
+            print(f"/predict c={concurrency}: {result['rps']} rps, p50 {result['p50_ms']} ms, p99 {result['p99_ms']} ms"
+                  + (f", cache hit rate {result['cache_hit_rate']}" if args.result_cache else ""))
+            predict.append(result)
+
+        batch = []
+        for level, batch_size in enumerate(args.batch_sizes, 1):
+            result = await bench_batch(client, df, batch_size, args.batch_repeats, seed=1000 * level)
+            print(f"/predict/batch n={batch_size}: {result['rows_per_sec']} rows/s")
+            batch.append(result)
+
+        insights = await bench_insights(client, args.insights_requests)
+        print(f"/data-insights: p50 {insights['p50_ms']} ms, p99 {insights['p99_ms']} ms")
+        shadow = (await client.get("/admin/shadow")).json() if args.challenger else None
+        if shadow is not None:
+            print(f"shadow: {shadow['scored_rows']} rows scored, {shadow['shed_rows']} shed")
+
+    return {
+        "model_ready_s": round(ready_s, 4),
+        "predict": predict,
+        "predict_max_rps": max(result["rps"] for result in predict),
+        "predict_batch": batch,
+        "data_insights": insights,
+        "shadow": shadow
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency/throughput benchmark for the scoring API (in-process ASGI)")
+    parser.add_argument("--rows", type=int, default=50_000, help="synthetic dataset rows")
+    parser.add_argument("--requests", type=int, default=2000, help="/predict requests per concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--batch-repeats", type=int, default=5)
+    parser.add_argument("--insights-requests", type=int, default=200)
+    parser.add_argument("--trees", type=int, default=100, help="RandomForest size of the benchmark model")
+    parser.add_argument("--compiled", action="store_true", help="serve the compiled export instead of model.pkl")
+    parser.add_argument("--challenger", action="store_true",
+                        help="also score a deeper forest in shadow, to measure its effect on /predict latency")
+    parser.add_argument("--result-cache", action="store_true",
+                        help="keep the result cache on (off by default, so the scoring path is measured)")
+    parser.add_argument("--output", default=os.path.join(REPO_DIR, "benchmarks", "results", "api.json"))
+    args = parser.parse_args()
+    args.output = os.path.abspath(args.output)
+
+    workspace = tempfile.mkdtemp(prefix="fraud-bench-")
+    print(f"Preparing synthetic workspace in {workspace}...")
+    df, _ = make_workspace(workspace, args.rows)
+    write_model_artifacts(df, os.path.join(workspace, "model_training"), n_estimators=args.trees,
+                          compiled=args.compiled)
+    if args.challenger:
+        challenger_dir = os.path.join(workspace, "model_training", "challenger")
+        os.makedirs(challenger_dir)
+        write_model_artifacts(df, challenger_dir, n_estimators=args.trees, max_depth=14, compiled=args.compiled)
+
+    start = time.perf_counter()
+    app = load_app(workspace, args.result_cache)
+    startup_s = time.perf_counter() - start
+
+    results = asyncio.run(run(app, df, args))
+    results["app_import_s"] = round(startup_s, 4)
+    write_results(args.output, {"meta": run_metadata(vars(args)), "results": results})
+    shutil.rmtree(workspace, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
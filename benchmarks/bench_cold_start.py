@@ -0,0 +1,136 @@
+import argparse
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+import numpy as np
+
+from common import run_metadata, write_results
+from synthetic import REPO_DIR, V_COLUMNS, make_workspace, write_model_artifacts
+
+BACKEND_DIR = os.path.join(REPO_DIR, "backend")
+
+# Imported in a fresh interpreter: how long `import main` takes and which heavy modules it pulls in
+IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+print(json.dumps({"import_s": elapsed, "modules": {name: name in sys.modules for name in ("pandas", "sklearn", "joblib")}}))
+"""
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def workspace_env(workspace):
+    env = dict(os.environ)
+    env.update(
+        FRAUD_MODEL_DIR=os.path.join(workspace, "model_training"),
+        FRAUD_DATA_PATH=os.path.join(workspace, "data", "creditcard.csv"),
+        PYTHONPATH=BACKEND_DIR
+    )
+    return env
+
+
+def measure_import(workspace):
+    output = subprocess.run([sys.executable, "-c", IMPORT_PROBE], cwd=os.path.join(workspace, "backend"),
+                            env=workspace_env(workspace), capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def measure_start(workspace, payload, timeout=120.0):
+    """Seconds from spawning uvicorn until it answers /health/live, /health/ready and a /predict."""
+    port = free_port()
+    # Run from the workspace's backend/ so older trees that resolve artifacts from the CWD work too
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--app-dir", BACKEND_DIR,
+         "--log-level", "warning"],
+        cwd=os.path.join(workspace, "backend"), env=workspace_env(workspace),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    start = time.perf_counter()
+    timings = {}
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=5.0) as client:
+            stages = [("live_s", lambda: client.get("/health/live")),
+                      ("ready_s", lambda: client.get("/health/ready")),
+                      ("first_prediction_s", lambda: client.post("/predict", json=payload))]
+            # One stage at a time, so polling adds little load to a server that is still loading
+            for key, send in stages:
+                while True:
+                    if time.perf_counter() - start > timeout:
+                        raise TimeoutError(f"No {key[:-2]} within {timeout}s")
+                    try:
+                        status = send().status_code
+                    except httpx.TransportError:
+                        status = None
+                    if status == 200:
+                        timings[key] = time.perf_counter() - start
+                        break
+                    if status == 404:
+                        # Trees without the health endpoints
+                        break
+                    time.sleep(0.01)
+    finally:
+        server.terminate()
+        server.wait()
+    return timings
+
+
+def summarize(runs, key):
+    values = [run[key] for run in runs if key in run]
+    if not values:
+        return None
+    return {"median_s": round(float(np.median(values)), 4), "min_s": round(float(min(values)), 4),
+            "max_s": round(float(max(values)), 4)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold start / time-to-first-prediction benchmark for the API")
+    parser.add_argument("--rows", type=int, default=50_000, help="synthetic dataset rows")
+    parser.add_argument("--trees", type=int, default=100, help="RandomForest size of the benchmark model")
+    parser.add_argument("--compiled", action="store_true", help="serve the compiled export instead of model.pkl")
+    parser.add_argument("--repeats", type=int, default=5, help="server starts to measure")
+    parser.add_argument("--output", default=os.path.join(REPO_DIR, "benchmarks", "results", "cold_start.json"))
+    args = parser.parse_args()
+    args.output = os.path.abspath(args.output)
+
+    workspace = tempfile.mkdtemp(prefix="fraud-bench-")
+    print(f"Preparing synthetic workspace in {workspace}...")
+    df, _ = make_workspace(workspace, args.rows)
+    write_model_artifacts(df, os.path.join(workspace, "model_training"), n_estimators=args.trees,
+                          compiled=args.compiled)
+    row = df.iloc[0]
+    payload = {"amount": float(row.Amount), "time": float(row.Time), **{name: float(row[name]) for name in V_COLUMNS}}
+
+    imports = [measure_import(workspace) for _ in range(args.repeats)]
+    runs = []
+    for i in range(args.repeats):
+        runs.append(measure_start(workspace, payload))
+        print(f"start {i + 1}: " + ", ".join(f"{key} {value:.3f}" for key, value in runs[-1].items()))
+
+    results = {
+        "import": {**summarize(imports, "import_s"), "modules": imports[0]["modules"]},
+        "live": summarize(runs, "live_s"),
+        "ready": summarize(runs, "ready_s"),
+        "first_prediction": summarize(runs, "first_prediction_s"),
+        "runs": runs
+    }
+    print(f"import main: {results['import']['median_s']} s, modules loaded: {results['import']['modules']}")
+    print(f"time to first prediction: {results['first_prediction']['median_s']} s (median of {args.repeats})")
+    write_results(args.output, {"meta": run_metadata(vars(args)), "results": results})
+    shutil.rmtree(workspace, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
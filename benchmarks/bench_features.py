@@ -0,0 +1,99 @@
+import argparse
+import gc
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from common import run_metadata, write_results
+from synthetic import MODEL_TRAINING_DIR, REPO_DIR, make_workspace
+
+sys.path.insert(0, MODEL_TRAINING_DIR)
+
+
+def frame_features(data):
+    """The DataFrame feature prep the training scripts used before features.py, for comparison."""
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import StandardScaler
+
+    df = data.to_frame()
+    scaler_amount = StandardScaler().fit(df[['Amount']])
+    scaler_time = StandardScaler().fit(df[['Time']])
+    df['scaled_amount'] = scaler_amount.transform(df[['Amount']])
+    df['scaled_time'] = scaler_time.transform(df[['Time']])
+    X = df.drop(['Class', 'Amount', 'Time'], axis=1)
+    y = df['Class']
+    X['scaled_amount'] = df['scaled_amount']
+    X['scaled_time'] = df['scaled_time']
+    return train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+
+
+def matrix_features(data):
+    from features import prepare_features
+
+    features = prepare_features(data, velocity=False, cache=False)
+    return features.X_train, features.X_test, features.y_train, features.y_test
+
+
+def measure(prepare, data):
+    """Time and tracemalloc peak of feature prep alone and of prep plus a small tree fit.
+
+    The fit shows the copy sklearn makes when the training matrix is not
+    already float32. Times come from an untraced run, since tracing slows
+    allocation-heavy code down.
+    """
+    from sklearn.tree import DecisionTreeClassifier
+
+    def run():
+        X_train, _, y_train, _ = prepare(data)
+        checkpoints.append((time.perf_counter(), tracemalloc.get_traced_memory()[1]))
+        DecisionTreeClassifier(max_depth=2, random_state=42).fit(X_train, y_train)
+        checkpoints.append((time.perf_counter(), tracemalloc.get_traced_memory()[1]))
+
+    gc.collect()
+    checkpoints = []
+    start = time.perf_counter()
+    run()
+    (prep_end, _), (fit_end, _) = checkpoints
+
+    gc.collect()
+    checkpoints = []
+    tracemalloc.start()
+    run()
+    tracemalloc.stop()
+    (_, prep_peak), (_, total_peak) = checkpoints
+    return {"prep_s": round(prep_end - start, 4), "prep_peak_mb": round(prep_peak / 2**20, 1),
+            "prep_and_fit_s": round(fit_end - start, 4), "prep_and_fit_peak_mb": round(total_peak / 2**20, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time and peak memory of training feature preparation")
+    parser.add_argument("--rows", type=int, default=284_807, help="synthetic dataset rows (creditcard.csv size)")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", default=os.path.join(REPO_DIR, "benchmarks", "results", "features.json"))
+    args = parser.parse_args()
+    args.output = os.path.abspath(args.output)
+
+    from dataset import load_dataset
+
+    workspace = tempfile.mkdtemp(prefix="fraud-bench-")
+    print(f"Preparing synthetic workspace in {workspace}...")
+    _, csv_path = make_workspace(workspace, args.rows)
+    data = load_dataset(csv_path)
+
+    results = {}
+    for label, prepare in [("dataframe", frame_features), ("feature_matrix", matrix_features)]:
+        runs = [measure(prepare, data) for _ in range(args.repeats)]
+        best = min(runs, key=lambda run: run["prep_s"])
+        results[label] = best
+        print(f"{label:<16} prep {best['prep_s']:.3f} s, peak {best['prep_peak_mb']} MB; "
+              f"with fit {best['prep_and_fit_s']:.3f} s, peak {best['prep_and_fit_peak_mb']} MB")
+
+    write_results(args.output, {"meta": run_metadata(vars(args)), "results": results})
+    shutil.rmtree(workspace, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
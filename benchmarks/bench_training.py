@@ -0,0 +1,66 @@
+import argparse
+import glob
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import run_metadata, write_results
+from synthetic import MODEL_TRAINING_DIR, REPO_DIR, make_workspace
+
+SCRIPTS = ["quick_fraud_model.py", "improved_fraud_model.py", "fraud_model.py", "streaming_fraud_model.py"]
+
+
+def run_script(script, cwd, extra_args=()):
+    """Run one training script; return wall time and the child's peak RSS.
+
+    Peak RSS comes from wait4() on the script process itself; joblib/loky
+    worker processes it spawns are not included.
+    """
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, script, *extra_args], cwd=cwd,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    stderr = process.stderr.read()
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    elapsed = time.perf_counter() - start
+    return {
+        "script": script,
+        "exit_code": process.returncode,
+        "wall_time_s": round(elapsed, 3),
+        # ru_maxrss is reported in kilobytes on Linux
+        "peak_rss_mb": round(usage.ru_maxrss / 1024, 1),
+        "stderr_tail": stderr.decode(errors="replace")[-2000:] if process.returncode else ""
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Wall time and peak RSS of the training scripts on synthetic data")
+    parser.add_argument("--rows", type=int, default=100_000, help="synthetic dataset rows")
+    parser.add_argument("--scripts", nargs="+", default=SCRIPTS, choices=SCRIPTS)
+    parser.add_argument("--output", default=os.path.join(REPO_DIR, "benchmarks", "results", "training.json"))
+    args = parser.parse_args()
+
+    workspace = tempfile.mkdtemp(prefix="fraud-bench-")
+    print(f"Preparing synthetic workspace in {workspace}...")
+    make_workspace(workspace, args.rows)
+    # Scripts resolve the dataset relative to their own directory, so run copies
+    work_dir = os.path.join(workspace, "model_training")
+    for path in glob.glob(os.path.join(MODEL_TRAINING_DIR, "*.py")):
+        shutil.copy(path, work_dir)
+
+    results = []
+    for script in args.scripts:
+        print(f"Running {script}...")
+        result = run_script(script, work_dir)
+        print(f"  exit {result['exit_code']}, {result['wall_time_s']} s, peak RSS {result['peak_rss_mb']} MB")
+        results.append(result)
+
+    write_results(args.output, {"meta": run_metadata(vars(args)), "results": results})
+    shutil.rmtree(workspace, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
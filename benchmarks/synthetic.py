@@ -0,0 +1,74 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+MODEL_TRAINING_DIR = os.path.join(REPO_DIR, "model_training")
+
+V_COLUMNS = [f'V{i}' for i in range(1, 29)]
+FEATURE_NAMES = V_COLUMNS + ['scaled_amount', 'scaled_time']
+
+# Roughly the public creditcard.csv: ~0.17% fraud over two days of transactions
+FRAUD_RATE = 0.0017
+TIME_SPAN = 172792
+# V features whose means shift for fraud rows, loosely following the real data
+FRAUD_SHIFTS = {'V4': 3.0, 'V10': -4.0, 'V11': 3.0, 'V12': -5.0, 'V14': -6.0, 'V17': -5.0}
+
+
+def make_transactions(n_rows, fraud_rate=FRAUD_RATE, seed=42):
+    """Creditcard-shaped DataFrame: Time, V1-V28, Amount, Class."""
+    rng = np.random.default_rng(seed)
+    label = (rng.random(n_rows) < fraud_rate).astype(np.int64)
+    V = rng.standard_normal((n_rows, len(V_COLUMNS)))
+    for name, shift in FRAUD_SHIFTS.items():
+        V[label == 1, V_COLUMNS.index(name)] += shift
+
+    df = pd.DataFrame(V, columns=V_COLUMNS)
+    df.insert(0, 'Time', np.sort(rng.uniform(0, TIME_SPAN, n_rows)).round())
+    df['Amount'] = np.round(rng.lognormal(mean=3.0, sigma=1.5, size=n_rows), 2)
+    df['Class'] = label
+    return df
+
+
+def make_workspace(root, n_rows, seed=42):
+    """Lay out root/{backend,model_training,data} like the repo, with synthetic data.
+
+    Pointing FRAUD_MODEL_DIR / FRAUD_DATA_PATH at root/model_training and
+    root/data serves the synthetic model and dataset; root/backend is a working
+    directory for trees that still resolved artifacts from the CWD.
+    """
+    for name in ("backend", "model_training", "data"):
+        os.makedirs(os.path.join(root, name), exist_ok=True)
+    df = make_transactions(n_rows, seed=seed)
+    csv_path = os.path.join(root, "data", "creditcard.csv")
+    df.to_csv(csv_path, index=False)
+    return df, csv_path
+
+
+def write_model_artifacts(df, model_dir, n_estimators=100, max_depth=10, compiled=False):
+    """Fit scalers and a RandomForest on ``df`` and save them as the backend expects."""
+    import joblib
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.preprocessing import StandardScaler
+
+    scaler_amount = StandardScaler().fit(df[['Amount']])
+    scaler_time = StandardScaler().fit(df[['Time']])
+    X = df[V_COLUMNS].copy()
+    X['scaled_amount'] = scaler_amount.transform(df[['Amount']])
+    X['scaled_time'] = scaler_time.transform(df[['Time']])
+    model = RandomForestClassifier(n_estimators=n_estimators, max_depth=max_depth,
+                                   class_weight='balanced', n_jobs=-1, random_state=42)
+    model.fit(X, df['Class'])
+
+    joblib.dump(model, os.path.join(model_dir, "model.pkl"))
+    joblib.dump(scaler_amount, os.path.join(model_dir, "scaler_amount.pkl"))
+    joblib.dump(scaler_time, os.path.join(model_dir, "scaler_time.pkl"))
+    joblib.dump(FEATURE_NAMES, os.path.join(model_dir, "feature_names.pkl"))
+    if compiled:
+        sys.path.insert(0, MODEL_TRAINING_DIR)
+        from export_model import export_model
+        export_model(model, FEATURE_NAMES, scaler_amount, scaler_time,
+                     os.path.join(model_dir, "model_compiled.npz"), X_check=X.iloc[:256])
+    return model
@@ -0,0 +1,257 @@
+import argparse
+import json
+import math
+import os
+import sys
+import time
+import warnings
+
+import joblib
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.model_selection import StratifiedKFold
+
+from dataset import load_dataset
+from features import prepare_features
+from imbalance import STRATEGIES, apply_strategy
+from orchestrator import memory
+from velocity import VELOCITY_FEATURES
+
+# The rule logic lives with the backend; the winning configuration is re-checked with it
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from scoring import (DEFAULT_RULES, MAX_FRAUD_PROBABILITY_THRESHOLD, RULES_FILE, apply_rules,  # noqa: E402
+                     rules_json)
+
+warnings.filterwarnings('ignore')
+
+# Candidate cut points beyond the current defaults, as quantiles of the data
+MAX_AMOUNT_QUANTILES = [0.99, 0.995, 0.999, 0.9995, 0.9999]
+HIGH_AMOUNT_QUANTILES = [0.9, 0.95, 0.98, 0.99, 0.995]
+FAST_TIME_QUANTILES = [0.0005, 0.001, 0.005, 0.01]
+SLOW_TIME_QUANTILES = [0.99, 0.995, 0.999, 0.9995]
+
+
+def _fit_fold(estimator, strategy, ratio, X, y, train, val):
+    candidates, X_fit, y_fit, sample_weight = apply_strategy(strategy, {'model': clone(estimator)},
+                                                             X[train], y[train], ratio=ratio, cache=False)
+    model = candidates['model']
+    if sample_weight is None:
+        model.fit(X_fit, y_fit)
+    else:
+        model.fit(X_fit, y_fit, sample_weight=sample_weight)
+    return model.predict_proba(X[val])[:, 1]
+
+
+@memory.cache
+def out_of_fold_proba(estimator, X, y, strategy='smote', ratio=0.1, n_folds=5, random_state=42):
+    """Fraud probability of every row from a clone of ``estimator`` that never saw it (cached).
+
+    Each fold is balanced with the training script's imbalance strategy and
+    fitted in its own worker process. Returns (proba, fold id of each row).
+    """
+    folds = list(StratifiedKFold(n_folds, shuffle=True, random_state=random_state).split(X, y))
+    results = Parallel(n_jobs=min(n_folds, os.cpu_count() or 1), backend='loky')(
+        delayed(_fit_fold)(estimator, strategy, ratio, X, y, train, val) for train, val in folds
+    )
+    proba = np.empty(len(y))
+    fold = np.empty(len(y), dtype=np.int64)
+    for k, ((_, val), fold_proba) in enumerate(zip(folds, results)):
+        proba[val] = fold_proba
+        fold[val] = k
+    return proba, fold
+
+
+def candidate_grid(amount, time_):
+    """Threshold and rule parameter values to sweep, the current defaults included.
+
+    Infinite bounds disable a rule. Returns {parameter: sorted float64 array}.
+    """
+    def cuts(values, quantiles, default, disabled):
+        return np.unique(np.concatenate([np.round(np.quantile(values, quantiles)), [default, disabled]]))
+
+    return {
+        # Capped so the model's own fraud predictions (probability > 50%) always stay flagged
+        "fraud_probability_threshold": np.arange(1.0, MAX_FRAUD_PROBABILITY_THRESHOLD + 1.0),
+        "max_amount": cuts(amount, MAX_AMOUNT_QUANTILES, DEFAULT_RULES["max_amount"], np.inf),
+        "high_amount": cuts(amount, HIGH_AMOUNT_QUANTILES, DEFAULT_RULES["high_amount"], np.inf),
+        "fast_time": cuts(time_, FAST_TIME_QUANTILES, DEFAULT_RULES["fast_time"], -np.inf),
+        "slow_time": cuts(time_, SLOW_TIME_QUANTILES, DEFAULT_RULES["slow_time"], np.inf)
+    }
+
+
+def sweep(fraud_prob, amount, time_, y, fold, grid):
+    """Flag counts of every configuration in ``grid``, per fold and class, in one pass.
+
+    Rows are reduced to a histogram over (fold, label, threshold bin, amount
+    bin, fast/slow time bin); a row's decision depends only on its bins.
+    Rows left unflagged by the threshold come from a cumulative sum over the
+    probability axis, and the amount/time rules are 0/1 masks over the other
+    bins, so all configurations are counted by one matrix product.
+    Returns flagged counts shaped (folds, 2, thresholds, max, high, fast, slow).
+    """
+    thresholds = grid["fraud_probability_threshold"]
+    max_amount, high_amount = grid["max_amount"], grid["high_amount"]
+    fast_time, slow_time = grid["fast_time"], grid["slow_time"]
+    amount_cuts = np.union1d(max_amount, high_amount)
+
+    # Bin codes: prob > thresholds[k] iff k < p_code, amount > amount_cuts[j] iff j < a_code,
+    # time < fast_time[j] iff f_code <= j, time > slow_time[j] iff j < s_code
+    p_code = np.searchsorted(thresholds, fraud_prob, side='left')
+    a_code = np.searchsorted(amount_cuts, amount, side='left')
+    f_code = np.searchsorted(fast_time, time_, side='right')
+    s_code = np.searchsorted(slow_time, time_, side='left')
+    n_folds = int(fold.max()) + 1
+    shape = (n_folds, 2, len(thresholds) + 1, len(amount_cuts) + 1, len(fast_time) + 1, len(slow_time) + 1)
+    cell = np.ravel_multi_index((fold, y.astype(np.int64), p_code, a_code, f_code, s_code), shape)
+    counts = np.bincount(cell, minlength=math.prod(shape)).reshape(shape).astype(np.float64)
+
+    # Rows with prob <= thresholds[k], for every k
+    below = np.cumsum(counts, axis=2)[:, :, :len(thresholds)]
+
+    # keep[m, h, f, s, a, fc, sc]: a row in bins (a, fc, sc) passes every amount/time rule
+    a = np.arange(shape[3])[:, None, None]
+    fc = np.arange(shape[4])[None, :, None]
+    sc = np.arange(shape[5])[None, None, :]
+    m_idx = np.searchsorted(amount_cuts, max_amount)[:, None, None, None, None, None, None]
+    h_idx = np.searchsorted(amount_cuts, high_amount)[None, :, None, None, None, None, None]
+    f_idx = np.arange(len(fast_time))[None, None, :, None, None, None, None]
+    s_idx = np.arange(len(slow_time))[None, None, None, :, None, None, None]
+    keep = (a <= m_idx) & ~((a > h_idx) & ((fc <= f_idx) | (sc > s_idx)))
+
+    rule_shape = keep.shape[:4]
+    unflagged = below.reshape(-1, math.prod(shape[3:])) @ keep.reshape(math.prod(rule_shape), -1).T
+    unflagged = unflagged.reshape(n_folds, 2, len(thresholds), *rule_shape)
+    totals = counts.sum(axis=(2, 3, 4, 5))[:, :, None, None, None, None, None]
+    return totals - unflagged
+
+
+def sweep_metrics(flagged, totals):
+    """Mean and standard deviation across folds of precision, recall and alert rate.
+
+    ``totals`` is (folds, 2) rows per fold and class. Returns {metric: array}
+    with the configuration axes of ``flagged``.
+    """
+    extra = (None,) * (flagged.ndim - 2)
+    fp, tp = flagged[:, 0], flagged[:, 1]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        per_fold = {
+            "precision": np.where(tp + fp > 0, tp / (tp + fp), 0.0),
+            "recall": tp / totals[(slice(None), 1) + extra],
+            "alert_rate": (tp + fp) / totals.sum(axis=1)[(slice(None),) + extra]
+        }
+    metrics = {}
+    for name, values in per_fold.items():
+        metrics[name] = values.mean(axis=0)
+        metrics[f"{name}_std"] = values.std(axis=0)
+    return metrics
+
+
+def select_config(metrics, min_precision, max_alert_rate):
+    """Configuration index with the best mean recall within the precision and alert budgets.
+
+    Ties go to the fewest alerts. Falls back to the best F1 when no
+    configuration meets both budgets; returns (index, met budgets).
+    """
+    recall, precision, alert_rate = metrics["recall"], metrics["precision"], metrics["alert_rate"]
+    eligible = (precision >= min_precision) & (alert_rate <= max_alert_rate)
+    if eligible.any():
+        # lexsort sorts by the last key first
+        order = np.lexsort((alert_rate.ravel(), -np.where(eligible, recall, -1).ravel()))
+        return np.unravel_index(order[0], recall.shape), True
+    with np.errstate(invalid='ignore', divide='ignore'):
+        f1 = np.nan_to_num(2 * precision * recall / (precision + recall))
+    return np.unravel_index(np.argmax(f1), recall.shape), False
+
+
+def summary(metrics, index):
+    return {name: round(float(values[index]), 6) for name, values in metrics.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate the fraud threshold and amount/time rules on "
+                                                 "out-of-fold probabilities and write rules.json")
+    parser.add_argument("--model", default="model.pkl")
+    parser.add_argument("--feature-names", default="feature_names.pkl")
+    parser.add_argument("--output", default=RULES_FILE)
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--imbalance", choices=STRATEGIES, default="smote",
+                        help="imbalance strategy the model was trained with")
+    parser.add_argument("--imbalance-ratio", type=float, default=0.1)
+    parser.add_argument("--min-precision", type=float, default=0.5,
+                        help="lowest mean precision across folds a configuration may have")
+    parser.add_argument("--max-alert-rate", type=float, default=0.005,
+                        help="largest mean share of transactions a configuration may flag")
+    args = parser.parse_args()
+
+    print("🎯 Calibrating fraud rules...")
+    data = load_dataset()
+    model = joblib.load(args.model)
+    feature_names = joblib.load(args.feature_names)
+    features = prepare_features(data, velocity=any(name in VELOCITY_FEATURES for name in feature_names))
+    if features.feature_names != feature_names:
+        raise ValueError(f"{args.model} was trained on different features: {feature_names}")
+
+    # Raw amount/time of every matrix row, as the backend sees them
+    amount = np.take(data.amount, features.index).astype(np.float64)
+    time_ = np.take(data.time, features.index).astype(np.float64)
+    y = features.y
+
+    print(f"🔁 Out-of-fold probabilities ({args.folds} folds, {args.imbalance})...")
+    start = time.perf_counter()
+    proba, fold = out_of_fold_proba(model, features.X, y, args.imbalance, args.imbalance_ratio, args.folds)
+    print(f"  done in {time.perf_counter() - start:.1f}s")
+    fraud_prob = proba * 100
+
+    grid = candidate_grid(amount, time_)
+    n_configs = math.prod(len(values) for values in grid.values())
+    print(f"🧮 Sweeping {n_configs} configurations over {len(y)} rows...")
+    start = time.perf_counter()
+    flagged = sweep(fraud_prob, amount, time_, y, fold, grid)
+    totals = np.stack([np.bincount(fold[y == label], minlength=args.folds) for label in (0, 1)], axis=1)
+    metrics = sweep_metrics(flagged, totals.astype(np.float64))
+    sweep_s = time.perf_counter() - start
+    print(f"  done in {sweep_s:.2f}s")
+
+    index, met_budgets = select_config(metrics, args.min_precision, args.max_alert_rate)
+    rules = {name: float(values[i]) for (name, values), i in zip(grid.items(), index)}
+    baseline = tuple(int(np.searchsorted(values, DEFAULT_RULES[name])) for name, values in grid.items())
+    if not met_budgets:
+        print("⚠️ No configuration meets the precision and alert budgets; using the best F1 instead")
+
+    # The sweep must agree with the rule logic the backend actually runs
+    for k in range(args.folds):
+        rows = fold == k
+        check = apply_rules(fraud_prob[rows], amount[rows], time_[rows], rules)
+        expected = [flagged[(k, label) + index] for label in (0, 1)]
+        if [(check & (y[rows] == label)).sum() for label in (0, 1)] != expected:
+            raise RuntimeError(f"Sweep and scoring.apply_rules disagree on fold {k}")
+
+    chosen, current = summary(metrics, index), summary(metrics, baseline)
+    print(f"{'':<10}{'precision':>11}{'recall':>9}{'alerts %':>10}")
+    for label, row in [("current", current), ("chosen", chosen)]:
+        print(f"{label:<10}{row['precision']:>11.4f}{row['recall']:>9.4f}{row['alert_rate'] * 100:>10.3f}")
+    print("Chosen rules: " + ", ".join(f"{name}={value:g}" for name, value in rules.items()))
+
+    with open(args.output, "w") as f:
+        json.dump({
+            "rules": rules_json(rules),
+            "calibration": {
+                "folds": args.folds,
+                "rows": int(len(y)),
+                "imbalance": args.imbalance,
+                "min_precision": args.min_precision,
+                "max_alert_rate": args.max_alert_rate,
+                "met_budgets": met_budgets,
+                "configurations": n_configs,
+                "sweep_seconds": round(sweep_s, 3),
+                "chosen": chosen,
+                "current": current
+            }
+        }, f, indent=2)
+    print(f"✅ Saved {args.output}")
+
+
+if __name__ == "__main__":
+    main()
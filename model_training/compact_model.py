@@ -0,0 +1,315 @@
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import joblib
+import numpy as np
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+
+# The compiled runtime lives with the backend; compaction evaluates candidates with it
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from compiled_model import CompiledModel, load_arrays  # noqa: E402
+
+warnings.filterwarnings('ignore')
+
+VALUE_DTYPES = ['float16', 'float32', 'float64']
+# A compact artifact must be at least this much smaller than the export to be written
+MIN_SIZE_SAVING = 0.05
+
+
+def tree_slices(arrays):
+    # Trees are stored back to back; tree t owns nodes [roots[t], roots[t + 1])
+    roots = arrays['roots'].astype(np.int64)
+    ends = np.append(roots[1:], len(arrays['feature']))
+    return list(zip(roots, ends))
+
+
+def collapse_nodes(arrays, leaf_tolerance):
+    """Turn splits whose two leaves differ by at most leaf_tolerance into leaves.
+
+    Repeats bottom-up until no split qualifies. The new leaf gets the mean of
+    the two leaf values (internal node values of boosted trees are not on the
+    leaf scale, so they cannot be reused). Returns the number of splits removed.
+    """
+    left = arrays['left'].copy()
+    right = arrays['right'].copy()
+    value = arrays['value'].astype(np.float64)
+    node_ids = np.arange(len(left))
+    removed = 0
+    while True:
+        is_leaf = left == node_ids
+        collapse = (~is_leaf & is_leaf[left] & is_leaf[right] &
+                    (np.abs(value[left] - value[right]) <= leaf_tolerance))
+        if not collapse.any():
+            break
+        value[collapse] = (value[left[collapse]] + value[right[collapse]]) / 2
+        left[collapse] = node_ids[collapse]
+        right[collapse] = node_ids[collapse]
+        removed += int(collapse.sum())
+    arrays['left'], arrays['right'], arrays['value'] = left, right, value
+    return removed
+
+
+def rebuild(arrays, keep_trees):
+    """Flat arrays holding only the kept trees and their reachable nodes."""
+    left, right = arrays['left'], arrays['right']
+    slices = tree_slices(arrays)
+    nodes, roots, depths = [], [], []
+    for t in keep_trees:
+        root = slices[t][0]
+        reachable = [np.array([root])]
+        frontier = reachable[0]
+        depth = 0
+        while True:
+            internal = frontier[left[frontier] != frontier]
+            if not len(internal):
+                break
+            frontier = np.concatenate([left[internal], right[internal]])
+            reachable.append(frontier)
+            depth += 1
+        roots.append(sum(len(n) for n in nodes))
+        nodes.append(np.sort(np.concatenate(reachable)))
+        depths.append(depth)
+    old = np.concatenate(nodes)
+    new_index = np.full(len(left), -1, dtype=np.int64)
+    new_index[old] = np.arange(len(old))
+    compact = dict(arrays)
+    compact.update(
+        feature=arrays['feature'][old],
+        threshold=arrays['threshold'][old],
+        left=new_index[left[old]].astype(np.int32),
+        right=new_index[right[old]].astype(np.int32),
+        value=arrays['value'][old],
+        roots=np.array(roots, dtype=np.int32),
+        max_depth=np.int32(max(depths))
+    )
+    if 'cover' in arrays:
+        compact['cover'] = arrays['cover'][old]
+    return compact
+
+
+def reduce_precision(arrays, value_dtype):
+    """Store leaf values as ``value_dtype`` and, for float32 models, thresholds as float32.
+
+    Thresholds are rounded down to the nearest float32, so float32 inputs take
+    exactly the same branches as before. Models evaluated on float64 inputs
+    (HistGradientBoosting) keep float64 thresholds, since float64 values
+    between the original and the rounded threshold would change branch.
+    Feature indices shrink to uint8.
+    """
+    reduced = dict(arrays)
+    if arrays['kind'] == 'linear':
+        reduced['coef'] = arrays['coef'].astype(np.float32)
+        return reduced
+    if str(arrays['x_dtype']) == 'float32':
+        threshold = arrays['threshold'].astype(np.float64)
+        threshold32 = threshold.astype(np.float32)
+        too_high = threshold32.astype(np.float64) > threshold
+        threshold32[too_high] = np.nextafter(threshold32[too_high], np.float32(-np.inf))
+        reduced['threshold'] = threshold32
+    reduced['value'] = arrays['value'].astype(value_dtype)
+    if arrays['feature'].max(initial=0) < 256:
+        reduced['feature'] = arrays['feature'].astype(np.uint8)
+    return reduced
+
+
+def per_tree_values(model, X, chunk_rows=4096):
+    # (rows, trees) leaf values, computed in chunks to bound the traversal's memory
+    X = np.asarray(X, dtype=model.x_dtype)
+    return np.vstack([model._leaf_values(X[i:i + chunk_rows]) for i in range(0, len(X), chunk_rows)])
+
+
+def select_trees(model, X_val, y_val, min_auc):
+    """Smallest set of trees whose ensemble stays at or above min_auc on (X_val, y_val).
+
+    Forests keep the individually strongest trees first; boosting keeps a prefix
+    of its stages, since later stages correct earlier ones. Returns (tree
+    indices, validation AUC); all trees when no smaller set qualifies.
+    """
+    values = per_tree_values(model, X_val)
+    n_trees = values.shape[1]
+    if model.kind == 'forest':
+        order = np.argsort([-roc_auc_score(y_val, values[:, t]) for t in range(n_trees)], kind='stable')
+        scores = np.cumsum(values[:, order], axis=1) / np.arange(1, n_trees + 1)
+    else:
+        order = np.arange(n_trees)
+        scores = model.base + model.scale * np.cumsum(values, axis=1)
+    for k in range(1, n_trees + 1):
+        auc = roc_auc_score(y_val, scores[:, k - 1])
+        if auc >= min_auc:
+            return np.sort(order[:k]), auc
+    return order, roc_auc_score(y_val, scores[:, -1])
+
+
+def split_held_out(X, y, validation_fraction=0.5, seed=42):
+    """Stratified (X_val, y_val, X_test, y_test) halves of a held-out set.
+
+    Trees are selected on the validation half and the result is checked and
+    reported on the test half, so the reported AUC is not biased by selection.
+    """
+    X_val, X_test, y_val, y_test = train_test_split(np.asarray(X, dtype=np.float64), np.asarray(y),
+                                                    train_size=validation_fraction, stratify=y,
+                                                    random_state=seed)
+    return X_val, y_val, X_test, y_test
+
+
+def compact_arrays(arrays, X_val, y_val, X_test, y_test, auc_tolerance=0.001, leaf_tolerance=0.01,
+                   value_dtype='float16'):
+    """Prune, collapse and quantize an exported model within auc_tolerance of its AUC.
+
+    Returns (compact arrays, report dict). Node collapsing and reduced precision
+    are applied first, and trees are then selected on the quantized model
+    against (X_val, y_val). The AUCs in the report are measured on
+    (X_test, y_test) for the artifact actually produced; ``within_tolerance``
+    says whether it stays within auc_tolerance of the original there.
+    """
+    X_val = np.asarray(X_val, dtype=np.float64)
+    y_val = np.asarray(y_val)
+    X_test = np.asarray(X_test, dtype=np.float64)
+    y_test = np.asarray(y_test)
+    reference = CompiledModel(arrays)
+    reference_auc = roc_auc_score(y_test, reference.fraud_probability(X_test))
+    report = {'reference_auc': reference_auc}
+
+    if str(arrays['kind']) == 'linear':
+        compact = reduce_precision(arrays, value_dtype)
+        report.update(trees=(0, 0), collapsed_splits=0)
+    else:
+        candidate = dict(arrays)
+        report['collapsed_splits'] = collapse_nodes(candidate, leaf_tolerance)
+        candidate = reduce_precision(candidate, value_dtype)
+        val_auc = roc_auc_score(y_val, reference.fraud_probability(X_val))
+        keep, _ = select_trees(CompiledModel(candidate), X_val, y_val, val_auc - auc_tolerance)
+        compact = rebuild(candidate, keep)
+        report['trees'] = (len(arrays['roots']), len(keep))
+        report['nodes'] = (len(arrays['feature']), len(compact['feature']))
+
+    model = CompiledModel(compact)
+    report['compact_auc'] = roc_auc_score(y_test, model.fraud_probability(X_test))
+    # select_trees keeps every tree when no subset qualifies, which need not be within tolerance either
+    report['within_tolerance'] = report['compact_auc'] >= reference_auc - auc_tolerance
+    if 'check_X' in compact:
+        # The stored check probabilities now describe the compact model
+        compact['check_proba'] = model.fraud_probability(compact['check_X'])
+    return compact, report
+
+
+def _timed(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def compare_artifacts(paths, X_val, y_val, repeats=5):
+    """Size, load time, latency and AUC of each artifact: {label: path} -> rows."""
+    X_val = np.asarray(X_val, dtype=np.float64)
+    rows = []
+    for label, path in paths.items():
+        if path.endswith('.pkl'):
+            load = lambda: joblib.load(path)  # noqa: E731
+        else:
+            load = lambda: CompiledModel.load(path)  # noqa: E731
+        load_s = _timed(load, repeats)
+        model = load()
+        single_ms = _timed(lambda: model.predict_proba(X_val[:1]), 50) * 1000
+        batch_us = _timed(lambda: model.predict_proba(X_val[:10000]), 3) / min(len(X_val), 10000) * 1e6
+        rows.append({
+            'artifact': label,
+            'size_kb': os.path.getsize(path) / 1024,
+            'load_ms': load_s * 1000,
+            'single_row_ms': single_ms,
+            'batch_us_per_row': batch_us,
+            'roc_auc': roc_auc_score(y_val, model.predict_proba(X_val)[:, 1])
+        })
+
+    print(f"{'artifact':<22}{'size KB':>10}{'load ms':>10}{'1-row ms':>10}{'us/row':>9}{'ROC-AUC':>9}")
+    for row in rows:
+        print(f"{row['artifact']:<22}{row['size_kb']:>10.0f}{row['load_ms']:>10.2f}"
+              f"{row['single_row_ms']:>10.3f}{row['batch_us_per_row']:>9.2f}{row['roc_auc']:>9.4f}")
+    base, compact = rows[0], rows[-1]
+    print(f"Compact vs {base['artifact']}: {base['size_kb'] / compact['size_kb']:.1f}x smaller, "
+          f"{base['load_ms'] / compact['load_ms']:.1f}x faster to load, "
+          f"{base['single_row_ms'] / compact['single_row_ms']:.1f}x faster per row, "
+          f"ROC-AUC {compact['roc_auc'] - base['roc_auc']:+.4f}")
+    return rows
+
+
+def compact_file(compiled_path, compact_path, X_held_out, y_held_out, auc_tolerance=0.001, leaf_tolerance=0.01,
+                 value_dtype='float16', model_path=None):
+    """Write the compact artifact for an exported model and print the comparison.
+
+    The held-out set is split in two: trees are selected on one half, and the
+    other half is used for the tolerance check and the comparison. Nothing is
+    written (and a previous compact file is removed) when the result loses more
+    than auc_tolerance ROC-AUC there, or is not at least MIN_SIZE_SAVING smaller
+    than the export, e.g. for a linear model, whose stored check rows outweigh
+    its coefficients. Returns the report, with ``written``.
+    """
+    print("🗜️ Compacting the exported model...")
+    X_val, y_val, X_test, y_test = split_held_out(X_held_out, y_held_out)
+    compact, report = compact_arrays(load_arrays(compiled_path), X_val, y_val, X_test, y_test,
+                                     auc_tolerance, leaf_tolerance, value_dtype)
+    if not report['within_tolerance']:
+        if os.path.exists(compact_path):
+            os.remove(compact_path)
+        print(f"  ⏭️ Test ROC-AUC {report['reference_auc']:.4f} -> {report['compact_auc']:.4f} loses more than "
+              f"{auc_tolerance}; no compact artifact written")
+        report['written'] = False
+        return report
+    np.savez(compact_path, **compact)
+    report['written'] = os.path.getsize(compact_path) <= (1 - MIN_SIZE_SAVING) * os.path.getsize(compiled_path)
+    if not report['written']:
+        # The backend would serve it in place of the export for no gain
+        os.remove(compact_path)
+        print(f"  ⏭️ Less than {MIN_SIZE_SAVING:.0%} smaller than {os.path.basename(compiled_path)}; "
+              "no compact artifact written")
+        return report
+    if report['trees'][0]:
+        print(f"  Trees: {report['trees'][0]} -> {report['trees'][1]}, "
+              f"nodes: {report['nodes'][0]} -> {report['nodes'][1]} "
+              f"({report['collapsed_splits']} splits collapsed)")
+    print(f"  Test ROC-AUC: {report['reference_auc']:.4f} -> {report['compact_auc']:.4f}")
+
+    paths = {}
+    if model_path and os.path.exists(model_path):
+        paths[os.path.basename(model_path)] = model_path
+    paths[os.path.basename(compiled_path)] = compiled_path
+    paths[os.path.basename(compact_path)] = compact_path
+    compare_artifacts(paths, X_test, y_test)
+    return report
+
+
+def held_out_set(compiled_path, test_size=0.2):
+    """The test split the training scripts evaluated on, rebuilt from the dataset cache."""
+    from features import prepare_features
+    from velocity import VELOCITY_FEATURES
+
+    feature_names = CompiledModel(load_arrays(compiled_path)).feature_names
+    features = prepare_features(test_size=test_size,
+                                velocity=any(name in VELOCITY_FEATURES for name in feature_names))
+    if features.feature_names != feature_names:
+        raise ValueError(f"{compiled_path} was trained on different features: {feature_names}")
+    return features.X_test, features.y_test
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prune and quantize model_compiled.npz into model_compact.npz")
+    parser.add_argument("--compiled", default="model_compiled.npz")
+    parser.add_argument("--output", default="model_compact.npz")
+    parser.add_argument("--auc-tolerance", type=float, default=0.001,
+                        help="maximum test ROC-AUC loss allowed for the compact model")
+    parser.add_argument("--leaf-tolerance", type=float, default=0.01,
+                        help="collapse splits whose two leaves differ by at most this much")
+    parser.add_argument("--value-dtype", choices=VALUE_DTYPES, default="float16", help="leaf value precision")
+    args = parser.parse_args()
+
+    X_test, y_test = held_out_set(args.compiled)
+    compact_file(args.compiled, args.output, X_test, y_test, args.auc_tolerance, args.leaf_tolerance,
+                 args.value_dtype, model_path="model.pkl")
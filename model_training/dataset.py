@@ -0,0 +1,170 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from velocity import ENTITY_COLUMN
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data")
+DEFAULT_CSV = os.path.join(DATA_DIR, "creditcard.csv")
+
+V_COLUMNS = [f'V{i}' for i in range(1, 29)]
+CSV_COLUMNS = ['Time'] + V_COLUMNS + ['Amount', 'Class']
+
+# Bump when the on-disk layout changes so stale caches are rebuilt
+CACHE_VERSION = 2
+
+
+def file_checksum(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def default_cache_dir(csv_path):
+    root, _ = os.path.splitext(csv_path)
+    return f"{root}_cache"
+
+
+class CreditCardData:
+    """Memory-mapped columnar copy of creditcard.csv.
+
+    ``V`` is an (n, 28) float32 matrix stored column-major, so each V feature is
+    contiguous; ``time`` and ``amount`` are float64 and ``label`` is int8.
+    ``card_id`` holds int64 codes of the optional card id column (-1 when
+    missing), or None if the CSV has no such column.
+    Arrays are read-only views of the cache files, shared through the page cache
+    by every process that loads them.
+    """
+
+    def __init__(self, cache_dir, mmap_mode='r'):
+        self.cache_dir = cache_dir
+        self.time = np.load(os.path.join(cache_dir, 'Time.npy'), mmap_mode=mmap_mode)
+        self.V = np.load(os.path.join(cache_dir, 'V.npy'), mmap_mode=mmap_mode)
+        self.amount = np.load(os.path.join(cache_dir, 'Amount.npy'), mmap_mode=mmap_mode)
+        self.label = np.load(os.path.join(cache_dir, 'Class.npy'), mmap_mode=mmap_mode)
+        card_path = os.path.join(cache_dir, f'{ENTITY_COLUMN}.npy')
+        self.card_id = np.load(card_path, mmap_mode=mmap_mode) if os.path.exists(card_path) else None
+
+    def __len__(self):
+        return len(self.label)
+
+    def to_frame(self):
+        """DataFrame with the CSV's columns, backed by the memory-mapped arrays."""
+        import pandas as pd
+
+        # One block per column, so pandas never consolidates (copies) the V matrix
+        columns = {'Time': self.time}
+        columns.update({name: self.V[:, i] for i, name in enumerate(V_COLUMNS)})
+        columns['Amount'] = self.amount
+        columns['Class'] = self.label
+        if self.card_id is not None:
+            columns[ENTITY_COLUMN] = self.card_id
+        return pd.DataFrame(columns, copy=False)
+
+
+def _read_meta(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, 'meta.json')) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _write_meta(cache_dir, meta):
+    tmp_path = os.path.join(cache_dir, 'meta.json.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, os.path.join(cache_dir, 'meta.json'))
+
+
+def _cache_is_current(csv_path, cache_dir, meta):
+    if meta is None or meta.get('version') != CACHE_VERSION:
+        return False
+    stat = os.stat(csv_path)
+    if meta['size'] == stat.st_size and meta['mtime'] == stat.st_mtime:
+        return True
+    # Touched but possibly unchanged: fall back to the checksum
+    if meta['size'] == stat.st_size and meta['sha256'] == file_checksum(csv_path):
+        meta['mtime'] = stat.st_mtime
+        _write_meta(cache_dir, meta)
+        return True
+    return False
+
+
+def convert_csv(csv_path, cache_dir):
+    """Parse the CSV once and write its columns as .npy files plus meta.json.
+
+    The files are written to a staging directory next to cache_dir, which then
+    replaces the old cache. Processes that still have the old arrays mapped
+    keep reading the old (now unlinked) files instead of a half-written one.
+    """
+    import pandas as pd
+
+    print(f"📦 Converting {csv_path} to columnar cache in {cache_dir}...")
+    dtypes = {name: np.float32 for name in V_COLUMNS}
+    dtypes.update({'Time': np.float64, 'Amount': np.float64, 'Class': np.int8})
+    usecols = list(CSV_COLUMNS)
+    has_cards = ENTITY_COLUMN in pd.read_csv(csv_path, nrows=0).columns
+    if has_cards:
+        usecols.append(ENTITY_COLUMN)
+        dtypes[ENTITY_COLUMN] = str
+    df = pd.read_csv(csv_path, usecols=usecols, dtype=dtypes)
+
+    parent, name = os.path.split(os.path.abspath(cache_dir))
+    os.makedirs(parent, exist_ok=True)
+    # Same parent directory, so the final renames stay on one filesystem
+    staging = tempfile.mkdtemp(prefix=f".{name}-", dir=parent)
+    retired = None
+    try:
+        np.save(os.path.join(staging, 'Time.npy'), df['Time'].to_numpy())
+        np.save(os.path.join(staging, 'V.npy'), np.asfortranarray(df[V_COLUMNS].to_numpy(dtype=np.float32)))
+        np.save(os.path.join(staging, 'Amount.npy'), df['Amount'].to_numpy())
+        np.save(os.path.join(staging, 'Class.npy'), df['Class'].to_numpy())
+        if has_cards:
+            # Velocity features only compare ids, so integer codes are enough
+            codes, _ = pd.factorize(df[ENTITY_COLUMN])
+            np.save(os.path.join(staging, f'{ENTITY_COLUMN}.npy'), codes.astype(np.int64))
+
+        stat = os.stat(csv_path)
+        _write_meta(staging, {
+            'version': CACHE_VERSION,
+            'sha256': file_checksum(csv_path),
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'rows': len(df)
+        })
+
+        # A directory cannot be replaced while it has files, so the old cache is moved aside first
+        if os.path.isdir(cache_dir):
+            retired = f"{staging}.old"
+            os.replace(cache_dir, retired)
+        os.replace(staging, cache_dir)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    if retired is not None:
+        shutil.rmtree(retired, ignore_errors=True)
+
+
+def load_dataset(csv_path=DEFAULT_CSV, cache_dir=None, mmap_mode='r'):
+    """Return the memory-mapped columnar dataset, converting the CSV if it changed."""
+    cache_dir = cache_dir or default_cache_dir(csv_path)
+    meta = _read_meta(cache_dir)
+    if not os.path.exists(csv_path):
+        if meta is None:
+            raise FileNotFoundError(f"Dataset not found: {csv_path}")
+        # The cache alone is enough when the CSV has been removed after conversion
+        return CreditCardData(cache_dir, mmap_mode=mmap_mode)
+    if not _cache_is_current(csv_path, cache_dir, meta):
+        convert_csv(csv_path, cache_dir)
+    return CreditCardData(cache_dir, mmap_mode=mmap_mode)
+
+
+def load_creditcard(csv_path=DEFAULT_CSV, cache_dir=None):
+    """Drop-in replacement for pd.read_csv("creditcard.csv") backed by the cache."""
+    return load_dataset(csv_path, cache_dir).to_frame()
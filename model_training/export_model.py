@@ -0,0 +1,156 @@
+import os
+
+import numpy as np
+from sklearn.ensemble import (GradientBoostingClassifier, HistGradientBoostingClassifier,
+                              RandomForestClassifier)
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+
+# Bump when the array layout changes; the backend refuses unknown versions
+FORMAT_VERSION = 1
+
+
+def _flatten_trees(trees):
+    """Concatenate trees into flat node arrays with absolute child indices.
+
+    ``trees`` is a list of (feature, threshold, left, right, value, cover) tuples
+    using per-tree indices and -1 for missing children; cover is the training
+    weight reaching each node. Leaves point to themselves so a fixed number of
+    traversal steps always ends on a leaf.
+    """
+    features, thresholds, lefts, rights, values, covers, roots, depths = [], [], [], [], [], [], [], []
+    offset = 0
+    for feature, threshold, left, right, value, cover in trees:
+        n_nodes = len(feature)
+        node_ids = np.arange(n_nodes)
+        is_leaf = left < 0
+        features.append(np.where(is_leaf, 0, feature).astype(np.int32))
+        thresholds.append(np.where(is_leaf, 0.0, threshold).astype(np.float64))
+        lefts.append((np.where(is_leaf, node_ids, left) + offset).astype(np.int32))
+        rights.append((np.where(is_leaf, node_ids, right) + offset).astype(np.int32))
+        values.append(np.asarray(value, dtype=np.float64))
+        covers.append(np.asarray(cover, dtype=np.float32))
+        roots.append(offset)
+        depths.append(_tree_depth(left, right))
+        offset += n_nodes
+    return {
+        'feature': np.concatenate(features),
+        'threshold': np.concatenate(thresholds),
+        'left': np.concatenate(lefts),
+        'right': np.concatenate(rights),
+        'value': np.concatenate(values),
+        # Used by the backend's explainer to weight a split's two branches
+        'cover': np.concatenate(covers),
+        'roots': np.array(roots, dtype=np.int32),
+        'max_depth': np.int32(max(depths))
+    }
+
+
+def _tree_depth(left, right):
+    depth = 0
+    frontier = [0]
+    while frontier:
+        frontier = [child for node in frontier for child in (left[node], right[node]) if child >= 0]
+        if frontier:
+            depth += 1
+    return depth
+
+
+def _sklearn_tree(tree, value):
+    return tree.feature, tree.threshold, tree.children_left, tree.children_right, value, tree.weighted_n_node_samples
+
+
+def flatten_model(model):
+    """Return the flat array representation of a fitted binary classifier."""
+    from imbalance import EasyEnsemble
+
+    if isinstance(model, EasyEnsemble) and all(isinstance(bag, RandomForestClassifier) and
+                                               bag.n_estimators == model.estimators_[0].n_estimators
+                                               for bag in model.estimators_):
+        # Equal-size forests: the mean over all their trees is the mean of the bag means
+        trees = []
+        for bag in model.estimators_:
+            for estimator in bag.estimators_:
+                counts = estimator.tree_.value[:, 0, :]
+                trees.append(_sklearn_tree(estimator.tree_, counts[:, 1] / counts.sum(axis=1)))
+        arrays = _flatten_trees(trees)
+        arrays.update(kind='forest', x_dtype='float32')
+    elif isinstance(model, EasyEnsemble):
+        # The mean of the bags' probabilities has no single linear or boosting form
+        raise TypeError(f"Cannot export an EasyEnsemble of {type(model.estimators_[0]).__name__} bags "
+                        "(only equal-size random forests)")
+    elif isinstance(model, RandomForestClassifier):
+        trees = []
+        for estimator in model.estimators_:
+            counts = estimator.tree_.value[:, 0, :]
+            # Fraction of class 1 at each node, as averaged by predict_proba
+            trees.append(_sklearn_tree(estimator.tree_, counts[:, 1] / counts.sum(axis=1)))
+        arrays = _flatten_trees(trees)
+        arrays.update(kind='forest', x_dtype='float32')
+    elif isinstance(model, GradientBoostingClassifier):
+        trees = [_sklearn_tree(est.tree_, est.tree_.value[:, 0, 0]) for est in model.estimators_[:, 0]]
+        arrays = _flatten_trees(trees)
+        n_features = model.n_features_in_
+        base = model._raw_predict_init(np.zeros((1, n_features), dtype=np.float32))[0, 0]
+        arrays.update(kind='boosting', x_dtype='float32', base=np.float64(base),
+                      scale=np.float64(model.learning_rate))
+    elif isinstance(model, HistGradientBoostingClassifier):
+        trees = []
+        for (predictor,) in model._predictors:
+            nodes = predictor.nodes
+            left = np.where(nodes['is_leaf'], -1, nodes['left'].astype(np.int64))
+            right = np.where(nodes['is_leaf'], -1, nodes['right'].astype(np.int64))
+            trees.append((nodes['feature_idx'], nodes['num_threshold'], left, right, nodes['value'], nodes['count']))
+        arrays = _flatten_trees(trees)
+        arrays.update(kind='boosting', x_dtype='float64',
+                      base=np.float64(model._baseline_prediction.ravel()[0]), scale=np.float64(1.0))
+    elif isinstance(model, (LogisticRegression, SGDClassifier)):
+        arrays = {'kind': 'linear', 'x_dtype': 'float64',
+                  'coef': model.coef_.ravel().astype(np.float64),
+                  'intercept': np.float64(model.intercept_[0])}
+    else:
+        raise TypeError(f"Cannot export model of type {type(model).__name__}")
+
+    if list(model.classes_) != [0, 1]:
+        raise ValueError(f"Expected binary classes [0, 1], got {list(model.classes_)}")
+    arrays['kind'] = np.array(arrays['kind'])
+    arrays['x_dtype'] = np.array(arrays['x_dtype'])
+    return arrays
+
+
+def export_model(model, feature_names, scaler_amount, scaler_time, path, X_check=None):
+    """Write the model, scaler parameters and feature order to a NumPy .npz file.
+
+    ``X_check`` (scaled rows in feature_names order) is stored with sklearn's
+    probabilities so the backend can verify the runtime when it loads the file.
+    """
+    arrays = flatten_model(model)
+    arrays.update(
+        format_version=np.int32(FORMAT_VERSION),
+        feature_names=np.array(feature_names),
+        amount_mean=np.float64(scaler_amount.mean_[0]),
+        amount_scale=np.float64(scaler_amount.scale_[0]),
+        time_mean=np.float64(scaler_time.mean_[0]),
+        time_scale=np.float64(scaler_time.scale_[0])
+    )
+    if X_check is not None:
+        X_check = np.asarray(X_check, dtype=np.float64)
+        arrays['check_X'] = X_check
+        arrays['check_proba'] = model.predict_proba(X_check)[:, 1]
+    np.savez(path, **arrays)
+    return path
+
+
+def export_or_remove(model, feature_names, scaler_amount, scaler_time, path, X_check=None):
+    """export_model(), or delete a previous export if this model type cannot be flattened.
+
+    The backend prefers the compiled file, so a stale one would shadow the new
+    model.pkl. Returns True when the export was written.
+    """
+    try:
+        export_model(model, feature_names, scaler_amount, scaler_time, path, X_check)
+        return True
+    except TypeError as e:
+        if os.path.exists(path):
+            os.remove(path)
+        print(f"⚠️ No compiled export ({e}); the backend will load model.pkl")
+        return False
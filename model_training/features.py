@@ -0,0 +1,99 @@
+import numpy as np
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+
+from dataset import V_COLUMNS, load_dataset
+from orchestrator import fit_scaler
+from velocity import VELOCITY_FEATURES, velocity_features
+
+# Column order of every training script's feature matrix (velocity features appended when used)
+BASE_FEATURES = V_COLUMNS + ['scaled_amount', 'scaled_time']
+
+
+class FeatureMatrix:
+    """Training features as one C-contiguous float32 matrix in ``feature_names`` order.
+
+    Rows are stored in split order, training rows first, so ``X_train`` and
+    ``X_test`` (and the labels) are views of the same buffer rather than
+    copies; ``index`` holds the dataset row of every matrix row.
+    """
+
+    def __init__(self, X, y, index, n_train, feature_names, scaler_amount, scaler_time):
+        self.X = X
+        self.y = y
+        self.index = index
+        self.n_train = n_train
+        self.feature_names = feature_names
+        self.scaler_amount = scaler_amount
+        self.scaler_time = scaler_time
+
+    @property
+    def X_train(self):
+        return self.X[:self.n_train]
+
+    @property
+    def X_test(self):
+        return self.X[self.n_train:]
+
+    @property
+    def y_train(self):
+        return self.y[:self.n_train]
+
+    @property
+    def y_test(self):
+        return self.y[self.n_train:]
+
+    @property
+    def train_index(self):
+        return self.index[:self.n_train]
+
+    @property
+    def test_index(self):
+        return self.index[self.n_train:]
+
+
+def split_index(y, test_size=0.2, random_state=42):
+    """Stratified (train, test) row indices, the same split train_test_split makes of the full frame."""
+    return train_test_split(np.arange(len(y)), test_size=test_size, random_state=random_state, stratify=y)
+
+
+def prepare_features(data=None, test_size=0.2, random_state=42, velocity=None, cache=True):
+    """Build the FeatureMatrix for the columnar dataset (``load_dataset()`` by default).
+
+    Each column is gathered from the memory-mapped cache straight into its
+    place in the output, in split order; nothing else of matrix size is
+    allocated. Amount and time are scaled through one reused float64 buffer,
+    exactly as the backend scales requests, before being stored as float32.
+    Velocity features are added when ``velocity`` is true, or by default when
+    the dataset has card ids. Scalers are fitted on the whole dataset (cached
+    per data hash unless ``cache=False``).
+    """
+    data = load_dataset() if data is None else data
+    if velocity is None:
+        velocity = data.card_id is not None
+    fit = fit_scaler if cache else lambda values: StandardScaler().fit(values)
+    scaler_amount = fit(np.asarray(data.amount).reshape(-1, 1))
+    scaler_time = fit(np.asarray(data.time).reshape(-1, 1))
+
+    train, test = split_index(data.label, test_size, random_state)
+    index = np.concatenate([train, test])
+    feature_names = BASE_FEATURES + (VELOCITY_FEATURES if velocity else [])
+    X = np.empty((len(index), len(feature_names)), dtype=np.float32)
+
+    # mode='clip' lets take() write into the strided column directly instead of through a buffer
+    n_v = data.V.shape[1]
+    for j in range(n_v):
+        np.take(data.V[:, j], index, out=X[:, j], mode='clip')
+    column = np.empty(len(index), dtype=np.float64)
+    for j, (values, scaler) in enumerate([(data.amount, scaler_amount), (data.time, scaler_time)], start=n_v):
+        np.take(values, index, out=column, mode='clip')
+        column -= scaler.mean_[0]
+        column /= scaler.scale_[0]
+        X[:, j] = column
+    if velocity:
+        extra = velocity_features(data.card_id, data.time, data.amount)
+        for k in range(extra.shape[1]):
+            np.take(extra[:, k], index, out=X[:, n_v + 2 + k], mode='clip')
+
+    y = np.take(data.label, index)
+    return FeatureMatrix(X, y, index, len(train), feature_names, scaler_amount, scaler_time)
@@ -1,35 +1,28 @@
-import pandas as pd
-from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import train_test_split, GridSearchCV
-from imblearn.over_sampling import SMOTE
+import argparse
+import sys
+from sklearn.model_selection import GridSearchCV
 from sklearn.linear_model import LogisticRegression
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
 from sklearn.metrics import classification_report, roc_auc_score, precision_recall_fscore_support
-
-df = pd.read_csv("../data/creditcard.csv")  # load dataset
-
-# Scale the amount and time features properly
-scaler_amount = StandardScaler()
-scaler_time = StandardScaler()
-df['scaled_amount'] = scaler_amount.fit_transform(df[['Amount']])
-df['scaled_time'] = scaler_time.fit_transform(df[['Time']])
-# Keep original features for proper feature alignment
-df_renamed = df.rename(columns={'scaled_amount': 'Amount', 'scaled_time': 'Time'})
-
-X = df_renamed.drop(['Class', 'Amount', 'Time'], axis=1)
-y = df_renamed['Class']
-# Add scaled features back
-X['Amount'] = df['scaled_amount']
-X['Time'] = df['scaled_time']
-
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=0.2, random_state=42, stratify=y
-)
-
-smote = SMOTE(random_state=42)
-X_train_resampled, y_train_resampled = smote.fit_resample(X_train, y_train)
-
-print("Data prepared\n")
+from export_model import export_or_remove
+from features import prepare_features
+from imbalance import STRATEGIES, apply_strategy, compare_strategies
+from orchestrator import evaluate, fit_candidates
+from reference_profile import save_profile
+
+parser = argparse.ArgumentParser(description="Train and tune the fraud models")
+parser.add_argument("--imbalance", choices=STRATEGIES, default="smote", help="class imbalance strategy")
+parser.add_argument("--imbalance-ratio", type=float, default=1.0, help="target fraud/legit ratio (1.0 = full balance)")
+parser.add_argument("--compare-imbalance", action="store_true",
+                    help="report fit time, peak memory and ROC-AUC of every strategy for the random forest, then exit")
+args = parser.parse_args()
+
+# One float32 matrix (memory-mapped columnar cache of ../data/creditcard.csv) with the
+# scaled amount/time under the names the backend expects; train/test are views of it
+features = prepare_features()
+scaler_amount, scaler_time = features.scaler_amount, features.scaler_time
+X_train, X_test = features.X_train, features.X_test
+y_train, y_test = features.y_train, features.y_test
 
 # Try multiple models with hyperparameter tuning
 
@@ -39,17 +32,6 @@ lr_params = {
     'penalty': ['l1', 'l2'],
     'solver': ['liblinear']
 }
-lr_grid = GridSearchCV(LogisticRegression(max_iter=1000, random_state=42), 
-                       lr_params, cv=3, scoring='roc_auc')
-lr_grid.fit(X_train_resampled, y_train_resampled)
-lr_best = lr_grid.best_estimator_
-
-y_pred_lr = lr_best.predict(X_test)
-print("Logistic Regression Results (Best)")
-print(classification_report(y_test, y_pred_lr))
-print("ROC-AUC:", roc_auc_score(y_test, lr_best.predict_proba(X_test)[:, 1]))
-
-print("\n-----------------------------------\n")
 
 # Random Forest with better parameters
 rf = RandomForestClassifier(
@@ -60,14 +42,6 @@ rf = RandomForestClassifier(
     random_state=42,
     class_weight='balanced'
 )
-rf.fit(X_train_resampled, y_train_resampled)
-y_pred_rf = rf.predict(X_test)
-
-print("Random Forest Results (Improved)")
-print(classification_report(y_test, y_pred_rf))
-print("ROC-AUC:", roc_auc_score(y_test, rf.predict_proba(X_test)[:, 1]))
-
-print("\n-----------------------------------\n")
 
 # Gradient Boosting for better performance
 gb = GradientBoostingClassifier(
@@ -76,21 +50,57 @@ gb = GradientBoostingClassifier(
     max_depth=6,
     random_state=42
 )
-gb.fit(X_train_resampled, y_train_resampled)
-y_pred_gb = gb.predict(X_test)
 
-print("Gradient Boosting Results")
-print(classification_report(y_test, y_pred_gb))
-print("ROC-AUC:", roc_auc_score(y_test, gb.predict_proba(X_test)[:, 1]))
+if args.compare_imbalance:
+    compare_strategies(rf, X_train, y_train, X_test, y_test, ratio=args.imbalance_ratio)
+    sys.exit(0)
+
+# Class imbalance handling (SMOTE output is cached, so reruns on unchanged data skip the resampling)
+candidates, X_train_resampled, y_train_resampled, sample_weight = apply_strategy(
+    args.imbalance,
+    {'Logistic Regression': LogisticRegression(max_iter=1000, random_state=42),
+     'Random Forest': rf, 'Gradient Boosting': gb},
+    X_train, y_train, ratio=args.imbalance_ratio
+)
+fit_params = {} if sample_weight is None else {'sample_weight': sample_weight}
+
+print(f"Data prepared ({args.imbalance}: {len(X_train_resampled)} training rows)\n")
+
+# Under easy_ensemble the logistic regression is wrapped, so its parameters get a prefix
+prefix = 'estimator__' if args.imbalance == 'easy_ensemble' else ''
+lr_grid = GridSearchCV(candidates.pop('Logistic Regression'),
+                       {prefix + name: values for name, values in lr_params.items()},
+                       cv=3, scoring='roc_auc', n_jobs=-1)  # folds in parallel
+lr_grid.fit(X_train_resampled, y_train_resampled, **fit_params)
+lr_best = lr_grid.best_estimator_
+
+# Fit RF and GB side by side in worker processes
+fitted, fit_times = fit_candidates(candidates, X_train_resampled, y_train_resampled,
+                                   sample_weight=sample_weight)
+rf, gb = fitted['Random Forest'], fitted['Gradient Boosting']
+
+# Test-set probabilities are computed once per model and reused below
+models = {'Logistic Regression': lr_best, 'Random Forest': rf, 'Gradient Boosting': gb}
+results = evaluate(models, X_test, y_test)
+titles = {
+    'Logistic Regression': "Logistic Regression Results (Best)",
+    'Random Forest': "Random Forest Results (Improved)",
+    'Gradient Boosting': "Gradient Boosting Results"
+}
+
+for i, (name, result) in enumerate(results.items()):
+    if i:
+        print("\n-----------------------------------\n")
+    print(titles[name])
+    if name in fit_times:
+        print(f"Fit time: {fit_times[name]:.1f}s")
+    print(classification_report(y_test, result['pred']))
+    print("ROC-AUC:", result['auc'])
 
 import joblib  # for saving model
 
 # Save the best performing model (comparing ROC-AUC scores)
-models_scores = {
-    'Logistic Regression': roc_auc_score(y_test, lr_best.predict_proba(X_test)[:, 1]),
-    'Random Forest': roc_auc_score(y_test, rf.predict_proba(X_test)[:, 1]),
-    'Gradient Boosting': roc_auc_score(y_test, gb.predict_proba(X_test)[:, 1])
-}
+models_scores = {name: result['auc'] for name, result in results.items()}
 
 best_model_name = max(models_scores, key=models_scores.get)
 print(f"\nBest model: {best_model_name} with ROC-AUC: {models_scores[best_model_name]:.4f}")
@@ -111,8 +121,15 @@ else:  # Gradient Boosting
     joblib.dump(scaler_time, "scaler_time.pkl")
 
 # Save feature names for proper prediction
-feature_names = list(X.columns)
+feature_names = features.feature_names
 joblib.dump(feature_names, "feature_names.pkl")
 
+# Reference distributions for the backend's drift monitor
+save_profile(features.X, feature_names, scaler_amount, scaler_time, results[best_model_name]['proba'])
+
+# Keep the backend's compiled runtime in sync with model.pkl
+export_or_remove(models[best_model_name], feature_names, scaler_amount, scaler_time, "model_compiled.npz",
+                 X_check=X_test[:256])
+
 print("✅ Model and scaler saved correctly")
 
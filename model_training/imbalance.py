@@ -0,0 +1,130 @@
+import time
+import tracemalloc
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import BaseEstimator, ClassifierMixin, clone
+from sklearn.metrics import roc_auc_score
+
+from orchestrator import fit_resample
+
+# Ways of handling the ~0.17% fraud rate, selectable in every training script
+STRATEGIES = ['smote', 'undersample', 'weights', 'easy_ensemble']
+
+
+def _take(X, index):
+    return X.iloc[index] if hasattr(X, 'iloc') else X[index]
+
+
+def undersample_index(y, ratio, rng):
+    """Row indices keeping every fraud row and enough legitimate rows for fraud/legit = ratio."""
+    y = np.asarray(y)
+    fraud = np.flatnonzero(y == 1)
+    legit = np.flatnonzero(y == 0)
+    n_legit = min(len(legit), int(round(len(fraud) / ratio)))
+    keep = rng.choice(legit, size=n_legit, replace=False)
+    return np.sort(np.concatenate([fraud, keep]))
+
+
+def balancing_weights(y, ratio):
+    """Per-row weights giving fraud/legit = ratio in total weight, without adding rows."""
+    y = np.asarray(y)
+    n_fraud = int((y == 1).sum())
+    n_legit = len(y) - n_fraud
+    fraud_weight = max(1.0, ratio * n_legit / n_fraud)
+    return np.where(y == 1, fraud_weight, 1.0)
+
+
+class EasyEnsemble(ClassifierMixin, BaseEstimator):
+    """Bag of ``n_bags`` copies of ``estimator``, each fitted on all fraud rows plus
+    a different random sample of legitimate rows (fraud/legit = ``ratio``).
+
+    Bags are fitted in parallel threads, which share the training data instead
+    of copying it; predict_proba averages the bags.
+    """
+
+    def __init__(self, estimator, n_bags=10, ratio=1.0, n_jobs=-1, random_state=42):
+        self.estimator = estimator
+        self.n_bags = n_bags
+        self.ratio = ratio
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+
+    def fit(self, X, y):
+        y = np.asarray(y)
+        rng = np.random.default_rng(self.random_state)
+        bags = [undersample_index(y, self.ratio, rng) for _ in range(self.n_bags)]
+        self.estimators_ = Parallel(n_jobs=self.n_jobs, prefer='threads')(
+            delayed(clone(self.estimator).fit)(_take(X, index), y[index]) for index in bags
+        )
+        self.classes_ = self.estimators_[0].classes_
+        self.n_features_in_ = self.estimators_[0].n_features_in_
+        return self
+
+    def predict_proba(self, X):
+        return np.mean([estimator.predict_proba(X) for estimator in self.estimators_], axis=0)
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def apply_strategy(strategy, candidates, X, y, ratio=0.1, n_bags=10, random_state=42, cache=True):
+    """Prepare candidates and training data for an imbalance strategy.
+
+    Returns (candidates, X_fit, y_fit, sample_weight) for fit_candidates():
+    - smote: synthetic fraud rows up to fraud/legit = ratio (cached per data hash
+      unless ``cache=False``)
+    - undersample: all fraud rows plus a random subset of legitimate rows
+    - weights: the original rows, fraud rows weighted up to the same ratio
+    - easy_ensemble: each candidate wrapped in an EasyEnsemble of balanced bags
+    """
+    if strategy == 'smote':
+        from imblearn.over_sampling import SMOTE
+
+        smote = SMOTE(random_state=random_state, sampling_strategy=ratio)
+        X_fit, y_fit = fit_resample(smote, X, y) if cache else smote.fit_resample(X, y)
+        return candidates, X_fit, y_fit, None
+    if strategy == 'undersample':
+        index = undersample_index(y, ratio, np.random.default_rng(random_state))
+        return candidates, _take(X, index), _take(y, index), None
+    if strategy == 'weights':
+        return candidates, X, y, balancing_weights(y, ratio)
+    if strategy == 'easy_ensemble':
+        wrapped = {name: EasyEnsemble(estimator, n_bags=n_bags, random_state=random_state)
+                   for name, estimator in candidates.items()}
+        return wrapped, X, y, None
+    raise ValueError(f"Unknown imbalance strategy '{strategy}', expected one of {STRATEGIES}")
+
+
+def compare_strategies(estimator, X_train, y_train, X_test, y_test, strategies=STRATEGIES, ratio=0.1):
+    """Fit ``estimator`` under each strategy; report fit time, peak memory and ROC-AUC.
+
+    Fits run one after another in this process so tracemalloc sees every
+    allocation (resampled copies, weights, the fitted model); the peak excludes
+    the training data that already exists before the fit. SMOTE bypasses the
+    resampling cache here so its cost is measured.
+    """
+    report = []
+    for strategy in strategies:
+        tracemalloc.start()
+        start = time.perf_counter()
+        candidates, X_fit, y_fit, weights = apply_strategy(strategy, {'model': clone(estimator)},
+                                                           X_train, y_train, ratio=ratio, cache=False)
+        model = candidates['model']
+        if weights is None:
+            model.fit(X_fit, y_fit)
+        else:
+            model.fit(X_fit, y_fit, sample_weight=weights)
+        fit_time = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        auc = roc_auc_score(y_test, model.predict_proba(X_test)[:, 1])
+        report.append({'strategy': strategy, 'rows': len(X_fit), 'fit_time_s': round(fit_time, 2),
+                       'peak_memory_mb': round(peak / 2**20, 1), 'roc_auc': round(auc, 4)})
+        del candidates, X_fit, y_fit, weights, model
+
+    print(f"{'strategy':<15}{'rows':>10}{'fit s':>10}{'peak MB':>10}{'ROC-AUC':>10}")
+    for row in report:
+        print(f"{row['strategy']:<15}{row['rows']:>10}{row['fit_time_s']:>10}"
+              f"{row['peak_memory_mb']:>10}{row['roc_auc']:>10}")
+    return report
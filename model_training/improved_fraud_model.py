@@ -1,66 +1,64 @@
-import pandas as pd
+import argparse
+import os
+import sys
 import numpy as np
-from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier, HistGradientBoostingClassifier
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import classification_report, roc_auc_score, confusion_matrix
-from imblearn.over_sampling import SMOTE
 import joblib
+from dataset import load_dataset
+from export_model import export_or_remove
+from features import prepare_features
+from imbalance import STRATEGIES, apply_strategy, compare_strategies
+from orchestrator import evaluate, fit_candidates, print_comparison, select_model
+from reference_profile import PROFILE_FILE, save_profile
 import warnings
 warnings.filterwarnings('ignore')
 
+parser = argparse.ArgumentParser(description="Train the improved fraud models")
+parser.add_argument("--imbalance", choices=STRATEGIES, default="smote", help="class imbalance strategy")
+parser.add_argument("--imbalance-ratio", type=float, default=0.1, help="target fraud/legit ratio")
+parser.add_argument("--compare-imbalance", action="store_true",
+                    help="report fit time, peak memory and ROC-AUC of every strategy for the random forest, then exit")
+parser.add_argument("--auc-tolerance", type=float, default=0.0,
+                    help="pick the fastest model (single-row latency) within this ROC-AUC of the best")
+parser.add_argument("--compact", action="store_true",
+                    help="also write model_compact.npz, pruned and quantized within 0.001 held-out ROC-AUC")
+parser.add_argument("--challenger", action="store_true",
+                    help="also save the runner-up to challenger/, which the backend scores in shadow")
+args = parser.parse_args()
+
 print("🚀 Starting improved fraud detection model training...")
 
 # Load the dataset
 print("📂 Loading dataset...")
-df = pd.read_csv("../data/creditcard.csv")
+data = load_dataset()
 
 # Basic data exploration
-print(f"Dataset shape: {df.shape}")
-print(f"Fraud cases: {df['Class'].sum()} ({df['Class'].mean()*100:.2f}%)")
-print(f"Legitimate cases: {len(df) - df['Class'].sum()}")
-
-# Prepare features - scale amount and time properly
+fraud_count = int(np.count_nonzero(data.label))
+print(f"Dataset rows: {len(data)}")
+print(f"Fraud cases: {fraud_count} ({fraud_count / len(data) * 100:.2f}%)")
+print(f"Legitimate cases: {len(data) - fraud_count}")
+
+# One float32 matrix in feature_names order, scaled amount/time and (with card ids)
+# per-card velocity features computed by the same store the backend updates per request;
+# train/test are views of it (scalers are cached per data hash)
 print("🔧 Preparing features...")
-scaler_amount = StandardScaler()
-scaler_time = StandardScaler()
-
-df['scaled_amount'] = scaler_amount.fit_transform(df[['Amount']])
-df['scaled_time'] = scaler_time.fit_transform(df[['Time']])
-
-# Separate features and target
-X = df.drop(['Class', 'Amount', 'Time'], axis=1)
-y = df['Class']
+features = prepare_features(data)
+scaler_amount, scaler_time = features.scaler_amount, features.scaler_time
+X_train, X_test = features.X_train, features.X_test
+y_train, y_test = features.y_train, features.y_test
 
-# Add scaled features
-X['scaled_amount'] = df['scaled_amount']
-X['scaled_time'] = df['scaled_time']
-
-print(f"Features shape: {X.shape}")
-
-# Split the data
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=0.2, random_state=42, stratify=y
-)
+print(f"Features shape: {features.X.shape}")
 
 print(f"Training set size: {len(X_train)}")
 print(f"Test set size: {len(X_test)}")
 print(f"Training fraud rate: {y_train.mean()*100:.2f}%")
 
-# Handle class imbalance with SMOTE
-print("⚖️ Balancing classes with SMOTE...")
-smote = SMOTE(random_state=42, sampling_strategy=0.1)  # More balanced ratio
-X_train_balanced, y_train_balanced = smote.fit_resample(X_train, y_train)
-
-print(f"Balanced training set size: {len(X_train_balanced)}")
-print(f"Balanced fraud rate: {y_train_balanced.mean()*100:.2f}%")
-
 # Train multiple models
 print("\n🤖 Training models...")
 
 # 1. Improved Random Forest
-print("1. Training Random Forest...")
 rf_model = RandomForestClassifier(
     n_estimators=300,
     max_depth=15,
@@ -71,10 +69,8 @@ rf_model = RandomForestClassifier(
     random_state=42,
     n_jobs=-1
 )
-rf_model.fit(X_train_balanced, y_train_balanced)
 
 # 2. Gradient Boosting
-print("2. Training Gradient Boosting...")
 gb_model = GradientBoostingClassifier(
     n_estimators=200,
     learning_rate=0.05,
@@ -84,10 +80,22 @@ gb_model = GradientBoostingClassifier(
     subsample=0.8,
     random_state=42
 )
-gb_model.fit(X_train_balanced, y_train_balanced)
 
-# 3. Logistic Regression with regularization
-print("3. Training Logistic Regression...")
+# 3. Histogram-based Gradient Boosting: features are binned once per fit (<=255 bins),
+# split finding is multi-threaded and boosting stops when the validation loss stalls
+hgb_model = HistGradientBoostingClassifier(
+    max_iter=500,
+    learning_rate=0.1,
+    max_leaf_nodes=31,
+    min_samples_leaf=20,
+    l2_regularization=1.0,
+    early_stopping=True,
+    validation_fraction=0.1,
+    n_iter_no_change=20,
+    random_state=42
+)
+
+# 4. Logistic Regression with regularization
 lr_model = LogisticRegression(
     C=0.1,
     penalty='l2',
@@ -96,29 +104,42 @@ lr_model = LogisticRegression(
     random_state=42,
     max_iter=1000
 )
-lr_model.fit(X_train_balanced, y_train_balanced)
 
-# Evaluate models
-print("\n📊 Model Evaluation Results:")
-print("=" * 50)
+if args.compare_imbalance:
+    print("⚖️ Comparing imbalance strategies on the Random Forest...")
+    compare_strategies(rf_model, X_train, y_train, X_test, y_test, ratio=args.imbalance_ratio)
+    sys.exit(0)
 
-models = {
+# Handle class imbalance (SMOTE output is cached per data hash)
+print(f"⚖️ Balancing classes with {args.imbalance}...")
+candidates, X_train_balanced, y_train_balanced, sample_weight = apply_strategy(args.imbalance, {
     'Random Forest': rf_model,
     'Gradient Boosting': gb_model,
+    'Hist Gradient Boosting': hgb_model,
     'Logistic Regression': lr_model
-}
+}, X_train, y_train, ratio=args.imbalance_ratio)
 
-best_model = None
-best_score = 0
-best_name = ""
+print(f"Balanced training set size: {len(X_train_balanced)}")
+print(f"Balanced fraud rate: {y_train_balanced.mean()*100:.2f}%")
+
+# Fit all candidates in parallel worker processes
+models, fit_times = fit_candidates(candidates, X_train_balanced, y_train_balanced,
+                                   sample_weight=sample_weight)
+for name, elapsed in fit_times.items():
+    print(f"  {name} trained in {elapsed:.1f}s")
+if hasattr(models['Hist Gradient Boosting'], 'n_iter_'):
+    print(f"  Hist Gradient Boosting stopped after {models['Hist Gradient Boosting'].n_iter_} iterations")
+
+# Evaluate models (one predict_proba per model)
+print("\n📊 Model Evaluation Results:")
+print("=" * 50)
+
+results = evaluate(models, X_test, y_test)
 
 for name, model in models.items():
-    # Predictions
-    y_pred = model.predict(X_test)
-    y_pred_proba = model.predict_proba(X_test)[:, 1]
-    
-    # Metrics
-    auc_score = roc_auc_score(y_test, y_pred_proba)
+    # Predictions and metrics from the single evaluation pass
+    y_pred = results[name]['pred']
+    auc_score = results[name]['auc']
     conf_matrix = confusion_matrix(y_test, y_pred)
     
     print(f"\n{name}:")
@@ -130,13 +151,16 @@ for name, model in models.items():
     # Detailed classification report
     print("  Classification Report:")
     print(classification_report(y_test, y_pred, digits=4))
-    
-    if auc_score > best_score:
-        best_score = auc_score
-        best_model = model
-        best_name = name
 
-print(f"\n🏆 Best Model: {best_name} with ROC-AUC: {best_score:.4f}")
+# Training time and inference cost next to AUC, so selection can trade accuracy for latency
+print("\n⏱️ Cost comparison:")
+print_comparison(results, fit_times)
+
+best_name = select_model(results, args.auc_tolerance)
+best_model = models[best_name]
+best_score = results[best_name]['auc']
+print(f"\n🏆 Best Model: {best_name} with ROC-AUC: {best_score:.4f} "
+      f"({results[best_name]['single_row_ms']:.3f} ms per single-row prediction)")
 
 # Save the best model and preprocessors
 print("\n💾 Saving model and preprocessors...")
@@ -145,9 +169,34 @@ joblib.dump(scaler_amount, "scaler_amount.pkl")
 joblib.dump(scaler_time, "scaler_time.pkl")
 
 # Save feature names for consistency
-feature_names = list(X.columns)
+feature_names = features.feature_names
 joblib.dump(feature_names, "feature_names.pkl")
 
+# Input and score distributions the backend's drift monitor compares live traffic to
+save_profile(features.X, feature_names, scaler_amount, scaler_time, results[best_name]['proba'], PROFILE_FILE)
+
+# Flat NumPy arrays for the backend's compiled runtime (no sklearn at serving time)
+exported = export_or_remove(best_model, feature_names, scaler_amount, scaler_time, "model_compiled.npz",
+                            X_check=X_test[:256])
+if args.compact and exported:
+    # Imported here: compaction needs backend/ (the compiled runtime) next to model_training/
+    from compact_model import compact_file
+
+    compacted = compact_file("model_compiled.npz", "model_compact.npz", X_test, y_test,
+                             model_path="model.pkl")['written']
+
+if args.challenger:
+    # Highest-AUC model other than the winner, in the same artifact layout under challenger/
+    runner_up = max((name for name in models if name != best_name), key=lambda name: results[name]['auc'])
+    os.makedirs("challenger", exist_ok=True)
+    joblib.dump(models[runner_up], os.path.join("challenger", "model.pkl"))
+    joblib.dump(scaler_amount, os.path.join("challenger", "scaler_amount.pkl"))
+    joblib.dump(scaler_time, os.path.join("challenger", "scaler_time.pkl"))
+    joblib.dump(feature_names, os.path.join("challenger", "feature_names.pkl"))
+    export_or_remove(models[runner_up], feature_names, scaler_amount, scaler_time,
+                     os.path.join("challenger", "model_compiled.npz"), X_check=X_test[:256])
+    print(f"🥈 Challenger: {runner_up} with ROC-AUC: {results[runner_up]['auc']:.4f}")
+
 print("✅ Model training completed successfully!")
 print(f"Saved {best_name} as the final model")
 print("Files saved:")
@@ -155,16 +204,22 @@ print("  - model.pkl (trained model)")
 print("  - scaler_amount.pkl (amount scaler)")
 print("  - scaler_time.pkl (time scaler)")
 print("  - feature_names.pkl (feature order)")
+print(f"  - {PROFILE_FILE} (feature and score distributions for drift monitoring)")
+print("  - model_compiled.npz (flattened model for the backend runtime)")
+if args.compact and exported and compacted:
+    print("  - model_compact.npz (pruned, quantized copy served in its place)")
+if args.challenger:
+    print("  - challenger/ (runner-up model, scored in shadow by the backend)")
 
 # Test the saved model
 print("\n🧪 Testing saved model...")
 loaded_model = joblib.load("model.pkl")
-test_prediction = loaded_model.predict(X_test.iloc[:5])
-test_probabilities = loaded_model.predict_proba(X_test.iloc[:5])
+test_prediction = loaded_model.predict(X_test[:5])
+test_probabilities = loaded_model.predict_proba(X_test[:5])
 
 print("Sample predictions:")
 for i in range(5):
-    actual = y_test.iloc[i]
+    actual = y_test[i]
     predicted = test_prediction[i]
     prob_fraud = test_probabilities[i][1]
     print(f"  Sample {i+1}: Actual={actual}, Predicted={predicted}, Fraud Probability={prob_fraud:.3f}")
\ No newline at end of file
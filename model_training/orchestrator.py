@@ -0,0 +1,117 @@
+import os
+import time
+
+import joblib
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.metrics import roc_auc_score
+from sklearn.preprocessing import StandardScaler
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+
+# joblib.Memory keys each call by a hash of its arguments (data and parameters),
+# so reruns on the same data skip preprocessing that has already been done
+memory = joblib.Memory(CACHE_DIR, verbose=0)
+
+
+@memory.cache
+def fit_scaler(values):
+    """StandardScaler fitted on ``values`` (cached)."""
+    return StandardScaler().fit(values)
+
+
+@memory.cache
+def fit_resample(sampler, X, y):
+    """``sampler.fit_resample(X, y)`` for imblearn samplers such as SMOTE (cached)."""
+    return sampler.fit_resample(X, y)
+
+
+def _fit_one(name, estimator, X, y, sample_weight=None):
+    start = time.perf_counter()
+    if sample_weight is None:
+        estimator.fit(X, y)
+    else:
+        estimator.fit(X, y, sample_weight=sample_weight)
+    return name, estimator, time.perf_counter() - start
+
+
+def fit_candidates(candidates, X, y, n_jobs=-1, sample_weight=None):
+    """Fit every candidate estimator in its own worker process.
+
+    Returns ({name: fitted estimator}, {name: fit seconds}). Large arrays are
+    memory-mapped into the workers by joblib instead of being copied.
+    """
+    n_jobs = len(candidates) if n_jobs == -1 else min(n_jobs, len(candidates))
+    results = Parallel(n_jobs=n_jobs, backend='loky')(
+        delayed(_fit_one)(name, estimator, X, y, sample_weight) for name, estimator in candidates.items()
+    )
+    models = {name: estimator for name, estimator, _ in results}
+    fit_times = {name: elapsed for name, _, elapsed in results}
+    return models, fit_times
+
+
+def inference_cost(model, X, batch_s, single_rows=50):
+    """Per-row cost of predict_proba: batch microseconds per row and median single-row ms.
+
+    ``batch_s`` is the time an already made predict_proba call on all of X took.
+    Single rows are timed with every n_jobs parameter set to 1: dispatching one
+    row to a worker pool costs far more than scoring it, and the backend serves
+    the compiled export, which has no pool, so timing the pool would rank
+    parallel ensembles by overhead they never pay in production.
+    """
+    batch_us = batch_s / len(X) * 1e6
+    params = model.get_params() if hasattr(model, 'get_params') else {}
+    n_jobs = {key: value for key, value in params.items()
+              if key.split('__')[-1] == 'n_jobs' and value != 1}
+    model.set_params(**{key: 1 for key in n_jobs})
+    single = []
+    try:
+        for i in range(min(single_rows, len(X))):
+            row = X.iloc[i:i + 1] if hasattr(X, 'iloc') else X[i:i + 1]
+            start = time.perf_counter()
+            model.predict_proba(row)
+            single.append(time.perf_counter() - start)
+    finally:
+        model.set_params(**n_jobs)
+    return batch_us, float(np.median(single)) * 1000
+
+
+def evaluate(models, X_test, y_test):
+    """Score each model on the test set with exactly one predict_proba call.
+
+    Returns {name: {'proba': fraud probabilities, 'pred': class predictions,
+    'auc': ROC-AUC, 'batch_us_per_row', 'single_row_ms'}}; predictions are
+    derived from the probabilities and the last two measure inference cost.
+    """
+    results = {}
+    for name, model in models.items():
+        start = time.perf_counter()
+        proba = model.predict_proba(X_test)
+        batch_s = time.perf_counter() - start
+        fraud_proba = proba[:, 1]
+        batch_us, single_ms = inference_cost(model, X_test, batch_s)
+        results[name] = {
+            'proba': fraud_proba,
+            'pred': model.classes_[np.argmax(proba, axis=1)],
+            'auc': roc_auc_score(y_test, fraud_proba),
+            'batch_us_per_row': batch_us,
+            'single_row_ms': single_ms
+        }
+    return results
+
+
+def select_model(results, auc_tolerance=0.0):
+    """Name of the fastest model (single-row latency) within auc_tolerance of the best ROC-AUC.
+
+    With the default tolerance of 0 this is simply the highest-AUC model.
+    """
+    best_auc = max(result['auc'] for result in results.values())
+    eligible = [name for name, result in results.items() if result['auc'] >= best_auc - auc_tolerance]
+    return min(eligible, key=lambda name: (results[name]['single_row_ms'], -results[name]['auc']))
+
+
+def print_comparison(results, fit_times):
+    print(f"{'model':<25}{'ROC-AUC':>9}{'fit s':>9}{'us/row':>9}{'1-row ms':>10}")
+    for name, result in results.items():
+        print(f"{name:<25}{result['auc']:>9.4f}{fit_times.get(name, float('nan')):>9.1f}"
+              f"{result['batch_us_per_row']:>9.2f}{result['single_row_ms']:>10.3f}")
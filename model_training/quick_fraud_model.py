@@ -1,53 +1,34 @@
-import pandas as pd
+import argparse
+import sys
 import numpy as np
-from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import classification_report, roc_auc_score, confusion_matrix
-from imblearn.over_sampling import SMOTE
 import joblib
+from features import prepare_features
+from imbalance import STRATEGIES, apply_strategy, compare_strategies
 import warnings
 warnings.filterwarnings('ignore')
 
-print("🚀 Starting quick fraud detection model training...")
+parser = argparse.ArgumentParser(description="Quickly train a Random Forest fraud model")
+parser.add_argument("--imbalance", choices=STRATEGIES, default="smote", help="class imbalance strategy")
+parser.add_argument("--imbalance-ratio", type=float, default=0.1, help="target fraud/legit ratio")
+parser.add_argument("--compare-imbalance", action="store_true",
+                    help="report fit time, peak memory and ROC-AUC of every strategy, then exit")
+args = parser.parse_args()
 
-# Load the dataset
-print("📂 Loading dataset...")
-df = pd.read_csv("data/creditcard.csv")
+print("🚀 Starting quick fraud detection model training...")
 
-# Prepare features - scale amount and time properly
+# Load the dataset and prepare features: one float32 matrix with scaled amount/time,
+# train/test are views of it
 print("🔧 Preparing features...")
-scaler_amount = StandardScaler()
-scaler_time = StandardScaler()
-
-df['scaled_amount'] = scaler_amount.fit_transform(df[['Amount']])
-df['scaled_time'] = scaler_time.fit_transform(df[['Time']])
-
-# Separate features and target
-X = df.drop(['Class', 'Amount', 'Time'], axis=1)
-y = df['Class']
-
-# Add scaled features
-X['scaled_amount'] = df['scaled_amount']
-X['scaled_time'] = df['scaled_time']
+features = prepare_features(cache=False)
+scaler_amount, scaler_time = features.scaler_amount, features.scaler_time
+X_train, X_test = features.X_train, features.X_test
+y_train, y_test = features.y_train, features.y_test
 
-print(f"Features shape: {X.shape}")
-
-# Split the data
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=0.2, random_state=42, stratify=y
-)
-
-# Handle class imbalance with SMOTE
-print("⚖️ Balancing classes with SMOTE...")
-smote = SMOTE(random_state=42, sampling_strategy=0.1)
-X_train_balanced, y_train_balanced = smote.fit_resample(X_train, y_train)
-
-print(f"Balanced training set size: {len(X_train_balanced)}")
-print(f"Balanced fraud rate: {y_train_balanced.mean()*100:.2f}%")
+print(f"Features shape: {features.X.shape}")
 
 # Train a simpler but effective Random Forest
-print("🤖 Training Random Forest...")
 model = RandomForestClassifier(
     n_estimators=100,  # Reduced for speed
     max_depth=10,
@@ -58,7 +39,24 @@ model = RandomForestClassifier(
     random_state=42,
     n_jobs=-1
 )
-model.fit(X_train_balanced, y_train_balanced)
+
+if args.compare_imbalance:
+    print("⚖️ Comparing imbalance strategies...")
+    compare_strategies(model, X_train, y_train, X_test, y_test, ratio=args.imbalance_ratio)
+    sys.exit(0)
+
+# Handle class imbalance
+print(f"⚖️ Balancing classes with {args.imbalance}...")
+candidates, X_train_balanced, y_train_balanced, sample_weight = apply_strategy(
+    args.imbalance, {'Random Forest': model}, X_train, y_train, ratio=args.imbalance_ratio, cache=False
+)
+model = candidates['Random Forest']
+
+print(f"Balanced training set size: {len(X_train_balanced)}")
+print(f"Balanced fraud rate: {y_train_balanced.mean()*100:.2f}%")
+
+print("🤖 Training Random Forest...")
+model.fit(X_train_balanced, y_train_balanced, **({} if sample_weight is None else {'sample_weight': sample_weight}))
 
 # Evaluate model
 print("\n📊 Model Evaluation:")
@@ -83,7 +81,7 @@ joblib.dump(scaler_amount, "scaler_amount.pkl")
 joblib.dump(scaler_time, "scaler_time.pkl")
 
 # Save feature names
-feature_names = list(X.columns)
+feature_names = features.feature_names
 joblib.dump(feature_names, "feature_names.pkl")
 
 print("✅ Quick model training completed!")
@@ -96,12 +94,12 @@ print("  - feature_names.pkl (feature order)")
 # Test the saved model
 print("\n🧪 Testing saved model...")
 loaded_model = joblib.load("quick_model.pkl")
-test_prediction = loaded_model.predict(X_test.iloc[:3])
-test_probabilities = loaded_model.predict_proba(X_test.iloc[:3])
+test_prediction = loaded_model.predict(X_test[:3])
+test_probabilities = loaded_model.predict_proba(X_test[:3])
 
 print("Sample predictions:")
 for i in range(3):
-    actual = y_test.iloc[i]
+    actual = y_test[i]
     predicted = test_prediction[i]
     prob_fraud = test_probabilities[i][1]
     print(f"  Sample {i+1}: Actual={actual}, Predicted={predicted}, Fraud Probability={prob_fraud:.3f}")
\ No newline at end of file
@@ -0,0 +1,52 @@
+import numpy as np
+
+# Bump when the array layout changes; the backend ignores profiles of other versions
+FORMAT_VERSION = 1
+
+PROFILE_FILE = "reference_profile.npz"
+
+# Each feature is binned at its training quantiles (5% of the rows per bin)
+FEATURE_BINS = 20
+# Fraud probability (%) bin edges, finer near 0 where almost all traffic scores
+SCORE_EDGES = np.array([0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 30, 50, 70, 90], dtype=np.float64)
+
+
+def build_profile(X, feature_names, scaler_amount, scaler_time, fraud_proba):
+    """Reference distribution of every model input and of the fraud score.
+
+    ``X`` is a training feature matrix in feature_names order; amount and time
+    are unscaled again, since the backend monitors raw request values.
+    ``fraud_proba`` are held-out probabilities of the saved model. Features with
+    fewer distinct quantiles than bins (counts, flags) get fewer bins; the
+    unused edges are +inf.
+    """
+    unscale = {'scaled_amount': scaler_amount, 'scaled_time': scaler_time}
+    edges = np.full((len(feature_names), FEATURE_BINS - 1), np.inf)
+    counts = np.zeros((len(feature_names), FEATURE_BINS), dtype=np.int64)
+    column = np.empty(len(X), dtype=np.float64)
+    quantiles = np.arange(1, FEATURE_BINS) / FEATURE_BINS
+    for j, name in enumerate(feature_names):
+        column[:] = X[:, j]
+        if name in unscale:
+            column *= unscale[name].scale_[0]
+            column += unscale[name].mean_[0]
+        cuts = np.unique(np.quantile(column, quantiles))
+        edges[j, :len(cuts)] = cuts
+        # Bin = number of edges <= value, as the backend computes it
+        counts[j] = np.bincount(np.searchsorted(edges[j], column, side='right'), minlength=FEATURE_BINS)
+
+    score_bins = np.searchsorted(SCORE_EDGES, np.asarray(fraud_proba) * 100, side='right')
+    return {
+        'format_version': np.int32(FORMAT_VERSION),
+        'feature_names': np.array(feature_names),
+        'edges': edges,
+        'counts': counts,
+        'score_edges': SCORE_EDGES,
+        'score_counts': np.bincount(score_bins, minlength=len(SCORE_EDGES) + 1)
+    }
+
+
+def save_profile(X, feature_names, scaler_amount, scaler_time, fraud_proba, path=PROFILE_FILE):
+    """Write the reference profile the backend's drift monitor compares live traffic to."""
+    np.savez(path, **build_profile(X, feature_names, scaler_amount, scaler_time, fraud_proba))
+    return path
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+from dataset import V_COLUMNS
+
+FEATURE_NAMES = V_COLUMNS + ['scaled_amount', 'scaled_time']
+
+
+def iter_chunks(csv_path, chunk_size):
+    """Yield (V, amount, time, label) NumPy arrays for each chunk of the CSV."""
+    dtypes = {name: np.float32 for name in V_COLUMNS}
+    dtypes.update({'Time': np.float64, 'Amount': np.float64, 'Class': np.int8})
+    for chunk in pd.read_csv(csv_path, dtype=dtypes, chunksize=chunk_size):
+        yield (chunk[V_COLUMNS].to_numpy(dtype=np.float32),
+               chunk['Amount'].to_numpy(),
+               chunk['Time'].to_numpy(),
+               chunk['Class'].to_numpy())
+
+
+def fit_scalers(csv_path, chunk_size):
+    """First pass: fit both scalers with partial_fit and count classes."""
+    scaler_amount = StandardScaler()
+    scaler_time = StandardScaler()
+    class_counts = np.zeros(2, dtype=np.int64)
+    for _, amount, time, label in iter_chunks(csv_path, chunk_size):
+        scaler_amount.partial_fit(amount.reshape(-1, 1))
+        scaler_time.partial_fit(time.reshape(-1, 1))
+        class_counts += np.bincount(label, minlength=2)
+    return scaler_amount, scaler_time, class_counts
+
+
+def feature_matrix(V, amount, time, scaler_amount, scaler_time):
+    """Assemble one float32 matrix in FEATURE_NAMES order."""
+    X = np.empty((len(V), len(FEATURE_NAMES)), dtype=np.float32)
+    X[:, :28] = V
+    X[:, 28] = (amount - scaler_amount.mean_[0]) / scaler_amount.scale_[0]
+    X[:, 29] = (time - scaler_time.mean_[0]) / scaler_time.scale_[0]
+    return X
+
+
+def test_mask(label, chunk_index, test_size=0.2, seed=42):
+    """Stratified train/test assignment for one chunk.
+
+    Each class contributes test_size of its rows (with randomized rounding so
+    small chunks stay unbiased). The RNG is seeded by chunk index, so every
+    pass over the file reproduces the same split.
+    """
+    rng = np.random.default_rng([seed, chunk_index])
+    mask = np.zeros(len(label), dtype=bool)
+    for cls in (0, 1):
+        rows = np.flatnonzero(label == cls)
+        expected = len(rows) * test_size
+        n_test = int(expected) + int(rng.random() < expected - int(expected))
+        mask[rng.choice(rows, size=n_test, replace=False)] = True
+    return mask
+
+
+def majority_keep_rate(class_counts, test_size, sampling_strategy):
+    # Fraction of legitimate rows to keep so minority/majority reaches sampling_strategy
+    legit, fraud = class_counts * (1 - test_size)
+    return min(1.0, fraud / (sampling_strategy * legit))
+
+
+def undersample(X, y, keep_rate, rng):
+    """Per-chunk rebalancing: keep every fraud row and a keep_rate share of the rest."""
+    keep = (y == 1) | (rng.random(len(y)) < keep_rate)
+    return X[keep], y[keep]
+
+
+class StreamingAUC:
+    """ROC-AUC from fixed-bin score histograms, so evaluation memory is constant."""
+
+    def __init__(self, bins=10000):
+        self.bins = bins
+        self.pos = np.zeros(bins, dtype=np.int64)
+        self.neg = np.zeros(bins, dtype=np.int64)
+
+    def update(self, y_true, y_score):
+        idx = np.minimum((np.asarray(y_score) * self.bins).astype(np.int64), self.bins - 1)
+        self.pos += np.bincount(idx[y_true == 1], minlength=self.bins)
+        self.neg += np.bincount(idx[y_true == 0], minlength=self.bins)
+
+    def score(self):
+        n_pos, n_neg = self.pos.sum(), self.neg.sum()
+        if n_pos == 0 or n_neg == 0:
+            return float('nan')
+        # Negatives strictly below each bin, plus half of the ties inside it
+        neg_below = np.cumsum(self.neg) - self.neg
+        return float((self.pos * (neg_below + 0.5 * self.neg)).sum() / (n_pos * n_neg))
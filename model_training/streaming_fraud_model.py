@@ -0,0 +1,96 @@
+import argparse
+import time
+
+import numpy as np
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import confusion_matrix
+import joblib
+import warnings
+from dataset import DEFAULT_CSV
+from export_model import export_model
+from reference_profile import PROFILE_FILE, save_profile
+from streaming import (FEATURE_NAMES, StreamingAUC, feature_matrix, fit_scalers, iter_chunks,
+                       majority_keep_rate, test_mask, undersample)
+warnings.filterwarnings('ignore')
+
+# Out-of-core training: memory is bounded by --chunk-size, never by the file size
+parser = argparse.ArgumentParser(description="Train the fraud model by streaming the CSV in chunks")
+parser.add_argument("--data", default=DEFAULT_CSV, help="transactions CSV in the creditcard.csv schema")
+parser.add_argument("--chunk-size", type=int, default=100_000, help="rows per chunk")
+parser.add_argument("--epochs", type=int, default=3, help="passes over the training rows")
+parser.add_argument("--sampling-strategy", type=float, default=0.1, help="target fraud/legit ratio after undersampling")
+parser.add_argument("--test-size", type=float, default=0.2)
+parser.add_argument("--profile-rows", type=int, default=50_000,
+                    help="held-out rows sampled for the drift monitor's reference profile")
+args = parser.parse_args()
+
+print("🚀 Starting streaming fraud detection model training...")
+start = time.perf_counter()
+
+# Pass 1: scalers and class counts
+print("🔧 Fitting scalers with partial passes...")
+scaler_amount, scaler_time, class_counts = fit_scalers(args.data, args.chunk_size)
+print(f"Rows: {class_counts.sum()}, fraud cases: {class_counts[1]} ({class_counts[1] / class_counts.sum() * 100:.2f}%)")
+
+keep_rate = majority_keep_rate(class_counts, args.test_size, args.sampling_strategy)
+print(f"⚖️ Keeping {keep_rate * 100:.2f}% of legitimate training rows per chunk")
+
+
+def training_chunks(epoch):
+    # Train rows of every chunk, rebalanced; the split is identical on every pass
+    rng = np.random.default_rng([42, epoch])
+    for chunk_index, (V, amount, time_, label) in enumerate(iter_chunks(args.data, args.chunk_size)):
+        train = ~test_mask(label, chunk_index, args.test_size)
+        X = feature_matrix(V[train], amount[train], time_[train], scaler_amount, scaler_time)
+        X, y = undersample(X, label[train], keep_rate, rng)
+        if len(y):
+            yield X, y
+
+
+# Logistic regression via partial_fit. Warm-started histogram boosting is not an option:
+# every fit() bins its chunk afresh, so earlier trees' bin thresholds stop matching
+print("\n🤖 Training SGD logistic regression...")
+model = SGDClassifier(loss='log_loss', alpha=1e-4, random_state=42)
+for epoch in range(args.epochs):
+    for X, y in training_chunks(epoch):
+        model.partial_fit(X, y, classes=np.array([0, 1]))
+    print(f"  Epoch {epoch + 1}/{args.epochs} done")
+
+# Final pass: evaluate the held-out rows with constant-memory accumulators
+print("\n📊 Evaluating on streamed test rows...")
+auc = StreamingAUC()
+conf_matrix = np.zeros((2, 2), dtype=np.int64)
+# A fixed-size random sample of the test rows (and their scores) for the reference profile
+profile_rate = min(1.0, args.profile_rows / (class_counts.sum() * args.test_size))
+profile_rng = np.random.default_rng(42)
+profile_X, profile_proba = [], []
+for chunk_index, (V, amount, time_, label) in enumerate(iter_chunks(args.data, args.chunk_size)):
+    test = test_mask(label, chunk_index, args.test_size)
+    X = feature_matrix(V[test], amount[test], time_[test], scaler_amount, scaler_time)
+    y_test = label[test]
+    if len(y_test) == 0:
+        continue
+    proba = model.predict_proba(X)[:, 1]
+    auc.update(y_test, proba)
+    conf_matrix += confusion_matrix(y_test, (proba >= 0.5).astype(int), labels=[0, 1])
+    sampled = profile_rng.random(len(y_test)) < profile_rate
+    profile_X.append(X[sampled])
+    profile_proba.append(proba[sampled])
+
+print(f"ROC-AUC Score: {auc.score():.4f}")
+print(f"Confusion Matrix:")
+print(f"  TN: {conf_matrix[0,0]}, FP: {conf_matrix[0,1]}")
+print(f"  FN: {conf_matrix[1,0]}, TP: {conf_matrix[1,1]}")
+
+# Same artifacts as the in-memory scripts, so the backend can serve this model unchanged
+print("\n💾 Saving model and preprocessors...")
+joblib.dump(model, "model.pkl")
+joblib.dump(scaler_amount, "scaler_amount.pkl")
+joblib.dump(scaler_time, "scaler_time.pkl")
+joblib.dump(FEATURE_NAMES, "feature_names.pkl")
+export_model(model, FEATURE_NAMES, scaler_amount, scaler_time, "model_compiled.npz", X_check=X[:256])
+# Replaces any profile of an earlier model, whose score distribution would not match this one
+save_profile(np.vstack(profile_X), FEATURE_NAMES, scaler_amount, scaler_time, np.concatenate(profile_proba),
+             PROFILE_FILE)
+
+print(f"✅ Streaming training completed in {time.perf_counter() - start:.1f}s")
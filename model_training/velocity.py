@@ -0,0 +1,152 @@
+import threading
+from array import array
+from collections import OrderedDict
+
+import numpy as np
+
+# Optional column (training data) / request field (serving) identifying the card or account
+ENTITY_COLUMN = 'card_id'
+
+# Sliding windows in seconds, matching the dataset's Time column
+WINDOWS = {'5m': 300, '1h': 3600, '24h': 86400}
+VELOCITY_FEATURES = ([f'txn_count_{label}' for label in WINDOWS] +
+                     [f'txn_amount_{label}' for label in WINDOWS] +
+                     ['seconds_since_last'])
+
+# seconds_since_last for a card's first transaction (or one with no card id)
+NO_HISTORY_GAP = float(max(WINDOWS.values()))
+
+
+def first_seen_features(amount):
+    """Features of a transaction with no earlier history."""
+    return [1.0] * len(WINDOWS) + [float(amount)] * len(WINDOWS) + [NO_HISTORY_GAP]
+
+
+def first_seen_matrix(amounts):
+    """first_seen_features() of many transactions, as an (n, len(VELOCITY_FEATURES)) matrix."""
+    amounts = np.asarray(amounts, dtype=np.float64)
+    n_windows = len(WINDOWS)
+    features = np.empty((len(amounts), len(VELOCITY_FEATURES)), dtype=np.float64)
+    features[:, :n_windows] = 1.0
+    features[:, n_windows:2 * n_windows] = amounts[:, None]
+    features[:, 2 * n_windows:] = NO_HISTORY_GAP
+    return features
+
+
+class _CardHistory:
+    """Ring buffer of one card's recent (time, amount) events plus per-window running totals.
+
+    Events are numbered by a running sequence number; event ``s`` lives in slot
+    ``s % capacity``. Each window keeps the sequence number of its oldest event
+    and the running count/sum, so adding an event only advances window starts
+    past expired events: O(1) amortized per event and window.
+    """
+
+    __slots__ = ('times', 'amounts', 'end', 'starts', 'sums', 'last_time')
+
+    def __init__(self, capacity, n_windows):
+        self.times = array('d', bytes(8 * capacity))
+        self.amounts = array('d', bytes(8 * capacity))
+        self.end = 0
+        self.starts = [0] * n_windows
+        self.sums = [0.0] * n_windows
+        self.last_time = None
+
+    def add(self, t, amount, windows):
+        capacity = len(self.times)
+        oldest_kept = self.end - capacity + 1
+        if oldest_kept > 0:
+            # The buffer is full: the event being overwritten leaves every window still holding it
+            dropped = self.amounts[self.end % capacity]
+            for w in range(len(windows)):
+                if self.starts[w] < oldest_kept:
+                    self.starts[w] = oldest_kept
+                    self.sums[w] -= dropped
+
+        gap = NO_HISTORY_GAP if self.last_time is None else min(t - self.last_time, NO_HISTORY_GAP)
+        slot = self.end % capacity
+        self.times[slot] = t
+        self.amounts[slot] = amount
+        self.end += 1
+        self.last_time = t
+
+        counts = []
+        sums = []
+        for w, width in enumerate(windows):
+            start = self.starts[w]
+            total = self.sums[w] + amount
+            while self.times[start % capacity] <= t - width:
+                total -= self.amounts[start % capacity]
+                start += 1
+            self.starts[w] = start
+            self.sums[w] = total
+            counts.append(float(self.end - start))
+            sums.append(total)
+        return counts + sums + [gap]
+
+
+class VelocityStore:
+    """Per-card sliding-window velocity features, bounded in memory.
+
+    ``update()`` records a transaction and returns its features in
+    VELOCITY_FEATURES order: transaction count and amount over each window,
+    both including the transaction itself, and seconds since the card's previous
+    transaction. Each card keeps at most ``capacity`` events; the least recently
+    seen cards are evicted beyond ``max_cards`` (None for no limit). Timestamps
+    must be non-decreasing per card; earlier ones are clamped to the last seen.
+    """
+
+    def __init__(self, capacity=256, max_cards=100000, windows=WINDOWS):
+        self.capacity = capacity
+        self.max_cards = max_cards
+        self.windows = list(windows.values())
+        self._cards = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._cards)
+
+    def update(self, card_id, t, amount):
+        with self._lock:
+            history = self._cards.get(card_id)
+            if history is None:
+                history = self._cards[card_id] = _CardHistory(self.capacity, len(self.windows))
+                if self.max_cards is not None and len(self._cards) > self.max_cards:
+                    self._cards.popitem(last=False)
+                    self.evictions += 1
+            else:
+                self._cards.move_to_end(card_id)
+            if history.last_time is not None and t < history.last_time:
+                t = history.last_time
+            return history.add(float(t), float(amount), self.windows)
+
+    def stats(self):
+        return {
+            "cards": len(self._cards),
+            "max_cards": self.max_cards,
+            "events_per_card": self.capacity,
+            "evictions": self.evictions,
+            "windows_s": dict(zip(WINDOWS, self.windows))
+        }
+
+
+def velocity_features(card_ids, times, amounts, capacity=256):
+    """Velocity features for a whole dataset, replaying it through a VelocityStore.
+
+    Rows are processed in time order with the same code the backend runs per
+    request, so training and serving features match. Rows whose card id is
+    missing (None, NaN or negative integer codes) get first_seen_features().
+    Returns an (n, len(VELOCITY_FEATURES)) float64 matrix in the input row order.
+    """
+    times = np.asarray(times, dtype=np.float64)
+    amounts = np.asarray(amounts, dtype=np.float64)
+    features = np.empty((len(times), len(VELOCITY_FEATURES)), dtype=np.float64)
+    store = VelocityStore(capacity=capacity, max_cards=None)
+    for i in np.argsort(times, kind='stable'):
+        card_id = card_ids[i]
+        if card_id is None or card_id != card_id or (isinstance(card_id, (int, np.integer)) and card_id < 0):
+            features[i] = first_seen_features(amounts[i])
+        else:
+            features[i] = store.update(card_id, times[i], amounts[i])
+    return features